@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cache_versao import em_cache_por_versao, limitar_arquivos, versao_dos_dados
+from data import DIRETORIO_CACHE
+from tendencias import serie_diaria
+
+# Estado dos detectores gravado por recorte; mudar VERSAO_DETECTOR descarta os estados salvos
+DIRETORIO_ANOMALIAS = DIRETORIO_CACHE / "anomalias"
+VERSAO_DETECTOR = 2
+# Estados mantidos em disco (um por filtro/polígono), os usados mais recentemente
+MAXIMO_ESTADOS = 256
+
+# Span (dias) das médias exponenciais, dias de aquecimento sem alertas e limiar do escore
+SPAN_ANOMALIA = 28
+DIAS_AQUECIMENTO = 14
+LIMIAR_ESCORE = 3.0
+
+# Desvio absoluto médio -> desvio padrão (distribuição normal)
+FATOR_DESVIO = 1.2533
+
+class DetectorAnomalias:
+    """
+    Detector em fluxo de dias com contagem anormal. Mantém média e desvio absoluto
+    médio exponenciais (O(1) por dia); o escore robusto compara o dia com o esperado
+    antes de atualizá-los. Dias anormais entram na atualização limitados ao limiar,
+    para que um pico isolado não desloque a linha de base.
+    """
+
+    def __init__(self, span=SPAN_ANOMALIA, limiar=LIMIAR_ESCORE, aquecimento=DIAS_AQUECIMENTO):
+        self.alpha = 2 / (span + 1)
+        self.limiar = limiar
+        self.aquecimento = aquecimento
+        self.media = 0.0
+        self.desvio = 0.0
+        self.dias = 0
+
+    def escala(self):
+        # Contagens baixas: o desvio de Poisson (raiz da média, no mínimo 1) é o piso
+        return max(FATOR_DESVIO * self.desvio, np.sqrt(max(self.media, 1.0)))
+
+    def atualizar(self, contagem):
+        """Processa o próximo dia; retorna (esperado, escore) — escore NaN no aquecimento"""
+        if self.dias == 0:
+            self.media, self.dias = float(contagem), 1
+            return float(contagem), np.nan
+
+        esperado, escala = self.media, self.escala()
+        escore = (contagem - esperado) / escala if self.dias >= self.aquecimento else np.nan
+        if self.dias >= self.aquecimento:
+            contagem = np.clip(contagem, esperado - self.limiar * escala, esperado + self.limiar * escala)
+        self.media += self.alpha * (contagem - esperado)
+        self.desvio += self.alpha * (abs(contagem - esperado) - self.desvio)
+        self.dias += 1
+        return esperado, escore
+
+    def estado(self):
+        return {"media": self.media, "desvio": self.desvio, "dias": self.dias}
+
+    def restaurar(self, estado):
+        self.media, self.desvio, self.dias = estado["media"], estado["desvio"], estado["dias"]
+        return self
+
+_lock_anomalias = threading.Lock()
+
+def caminho_estado(versao):
+    """Arquivo de estado do recorte (versão sem o fingerprint: vale entre planilhas)"""
+    recorte = versao.partition("|")[2] if versao else ""
+    chave = hashlib.sha256(recorte.encode()).hexdigest()[:16]
+    return DIRETORIO_ANOMALIAS / f"detector-{chave}.json"
+
+def impressao_contagens(serie, dias):
+    """Hash das contagens dos `dias` primeiros dias da série"""
+    contagens = np.ascontiguousarray(serie.contagens[:dias], dtype=np.int64)
+    return hashlib.blake2b(contagens.tobytes(), digest_size=16).hexdigest()
+
+def _ler_estado(caminho, serie):
+    """Estado salvo, se a série atual só estende os dias já processados"""
+    try:
+        salvo = json.loads(caminho.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    dias = salvo.get("dias_processados", 0)
+    if (
+        salvo.get("versao") != VERSAO_DETECTOR
+        or pd.Timestamp(salvo["inicio"]) != serie.inicio
+        or not 0 < dias <= len(serie)
+        # Mesmas contagens em todos os dias já processados: histórico inalterado
+        or impressao_contagens(serie, dias) != salvo["impressao"]
+    ):
+        return None
+    try:
+        # Marca o uso para a poda por mtime
+        os.utime(caminho)
+    except FileNotFoundError:
+        pass
+    return salvo
+
+@em_cache_por_versao()
+def anomalias_diarias(df):
+    """
+    Dias com contagem anormal no recorte (Sinistros, Esperado, Escore). O estado do
+    detector fica salvo em disco por recorte: com dados novos, só os dias
+    posteriores ao último processado são avaliados.
+    """
+    versao = versao_dos_dados(df)
+    serie = serie_diaria(df)
+    caminho = caminho_estado(versao) if versao else None
+    salvo = None
+    if caminho is not None:
+        with _lock_anomalias:
+            salvo = _ler_estado(caminho, serie)
+
+    detector = DetectorAnomalias()
+    if salvo is not None:
+        detector.restaurar(salvo["detector"])
+        inicio, sinalizados = salvo["dias_processados"], salvo["sinalizados"]
+    else:
+        inicio, sinalizados = 0, []
+
+    # Só os dias novos passam pelo detector
+    for dia in range(inicio, len(serie)):
+        contagem = int(serie.contagens[dia])
+        esperado, escore = detector.atualizar(contagem)
+        if abs(escore) >= detector.limiar:
+            data = (serie.inicio + pd.Timedelta(days=dia)).date().isoformat()
+            sinalizados.append([data, contagem, round(esperado, 3), round(float(escore), 3)])
+
+    if caminho is not None and len(serie):
+        estado = {
+            "versao": VERSAO_DETECTOR,
+            "inicio": serie.inicio.isoformat(),
+            "dias_processados": len(serie),
+            "impressao": impressao_contagens(serie, len(serie)),
+            "detector": detector.estado(),
+            "sinalizados": sinalizados,
+        }
+        with _lock_anomalias:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            temporario = caminho.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+            temporario.write_text(json.dumps(estado), encoding="utf-8")
+            os.replace(temporario, caminho)
+            limitar_arquivos(DIRETORIO_ANOMALIAS, "detector-*.json", MAXIMO_ESTADOS)
+
+    anomalias = pd.DataFrame(sinalizados, columns=["Data", "Sinistros", "Esperado", "Escore"])
+    anomalias["Data"] = pd.to_datetime(anomalias["Data"])
+    return anomalias.set_index("Data")
@@ -1,53 +1,56 @@
 import streamlit as st
 from config import configurar_pagina
-from data import load_data, VEICULOS, preparar_dados_veiculos
+from data import load_data, filtrar_periodo, VEICULOS, preparar_dados_veiculos
+from cubo import construir_cubo
+from figuras import metricas_figuras
 from tabs.mapas_calor import tab_mapas_calor
 from tabs.analise_temporal import tab_analise_temporal, criar_grafico_temporal
 from tabs.analise_horario import tab_analise_horario, criar_grafico_horario
 from tabs.analise_local import tab_analise_local, criar_grafico_local
 from tabs.analise_veiculos import tab_analise_veiculos, criar_grafico_veiculos
 from tabs.chat_bot import tab_chat_bot
+from tabs.geocerca import seletor_geocerca, recorte_geocerca
+
+# Período analisado pelas abas
+ANO_INICIO, ANO_FIM = 2021, 2023
 
 # Configuração inicial
 configurar_pagina()
 
 # Carregar dados
 df = load_data()
-df_filtrado = df[(df["Data do Sinistro"].dt.year >= 2021) & (df["Data do Sinistro"].dt.year <= 2023)]
-
-# Preparar dados para gráficos de veículos
-relacao_logradouro_veiculos_sorted = preparar_dados_veiculos(df_filtrado)
-
-# Criar abas
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-    "Mapas de Calor", 
-    "Análise Temporal", 
-    "Análise por Horário", 
-    "Análise por Local",
-    "Análise de Veículos",
-    "Chat Bot"
-])
-
-# Renderizar cada tab
-with tab1:
-    tab_mapas_calor(df_filtrado)
 
-with tab2:
-    tab_analise_temporal(df_filtrado)
+# Área desenhada na barra lateral: o recorte (em cache por polígono) alimenta todas as abas
+geocerca = seletor_geocerca(df)
+if geocerca:
+    df_area = recorte_geocerca(df, geocerca, ANO_INICIO, ANO_FIM)
+    if df_area is not None:
+        df = df_area
+    else:
+        st.sidebar.warning(
+            f"Nenhum sinistro de {ANO_INICIO} a {ANO_FIM} dentro da área desenhada; exibindo todos os dados."
+        )
 
-with tab3:
-    tab_analise_horario(df_filtrado)
+df_filtrado = filtrar_periodo(df, ANO_INICIO, ANO_FIM)
 
-with tab4:
-    tab_analise_local(df_filtrado, VEICULOS, relacao_logradouro_veiculos_sorted)
+# Cubo de agregação (em cache por recorte dos dados) recortado no mesmo período
+cubo_filtrado = construir_cubo(df).fatiar(ano=range(ANO_INICIO, ANO_FIM + 1))
 
-with tab5:
-    tab_analise_veiculos(df_filtrado, VEICULOS, relacao_logradouro_veiculos_sorted)
+# Preparar dados para gráficos de veículos
+relacao_logradouro_veiculos_sorted = preparar_dados_veiculos(cubo_filtrado)
 
-with tab6:
-    tab_chat_bot(
+# Criar abas. Diferente de st.tabs, que executa o conteúdo de todas as abas a cada
+# interação, apenas a aba selecionada é renderizada; as demais ficam inativas
+abas = {
+    "Mapas de Calor": lambda: tab_mapas_calor(df_filtrado),
+    "Análise Temporal": lambda: tab_analise_temporal(df_filtrado, cubo_filtrado),
+    "Análise por Horário": lambda: tab_analise_horario(cubo_filtrado),
+    "Análise por Local": lambda: tab_analise_local(df_filtrado, cubo_filtrado, VEICULOS, relacao_logradouro_veiculos_sorted),
+    "Análise de Veículos": lambda: tab_analise_veiculos(cubo_filtrado, VEICULOS, relacao_logradouro_veiculos_sorted),
+    "Chat Bot": lambda: tab_chat_bot(
         df_filtrado, 
         df,  # Dataset completo
+        cubo_filtrado,
         relacao_logradouro_veiculos_sorted,
         {
             'criar_grafico_temporal': criar_grafico_temporal,
@@ -55,4 +58,26 @@ with tab6:
             'criar_grafico_local': criar_grafico_local,
             'criar_grafico_veiculos': criar_grafico_veiculos
         }
-    )
\ No newline at end of file
+    )
+}
+
+aba_selecionada = st.radio(
+    "Aba", 
+    list(abas), 
+    horizontal=True, 
+    label_visibility="collapsed", 
+    key="aba_selecionada"
+)
+
+# Renderizar somente a tab selecionada
+abas[aba_selecionada]()
+
+# Métricas do ciclo de vida das figuras matplotlib (memória do servidor)
+metricas = metricas_figuras()
+with st.sidebar.expander("Diagnóstico"):
+    st.caption(
+        f"Figuras ativas: {metricas['figuras_ativas']} "
+        f"({metricas['bytes_figuras_ativas'] / 1e6:.1f} MB)  \n"
+        f"Figuras em cache: {metricas['figuras_em_cache']} "
+        f"({metricas['bytes_cache'] / 1e6:.1f} MB)"
+    )
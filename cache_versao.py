@@ -0,0 +1,95 @@
+import functools
+import hashlib
+import inspect
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Entradas mantidas por cache. Cada polígono desenhado ou filtro gera uma versão
+# nova dos dados; as menos usadas são descartadas em vez de ficar na memória
+MAXIMO_VERSOES = 32
+
+def limitar_arquivos(diretorio, padrao, maximo):
+    """
+    Mantém em `diretorio` só os `maximo` arquivos `padrao` usados mais recentemente
+    (quem lê um arquivo do cache atualiza o mtime dele); os demais são apagados.
+    """
+    arquivos = []
+    for arquivo in diretorio.glob(padrao):
+        try:
+            arquivos.append((arquivo.stat().st_mtime_ns, arquivo))
+        except FileNotFoundError:
+            # Apagado por outro processo durante a varredura
+            continue
+    arquivos.sort(reverse=True)
+    for _, arquivo in arquivos[maximo:]:
+        arquivo.unlink(missing_ok=True)
+
+def impressao_indice(indice):
+    """Hash das linhas (rótulos do índice) de um DataFrame"""
+    if isinstance(indice, pd.RangeIndex):
+        return f"range-{indice.start}-{indice.stop}-{indice.step}"
+    if indice.dtype.kind in "iu":
+        valores = np.ascontiguousarray(indice.to_numpy(dtype=np.int64))
+    else:
+        valores = pd.util.hash_pandas_object(indice, index=False).to_numpy()
+    return hashlib.blake2b(valores.tobytes(), digest_size=16).hexdigest()
+
+def versionar(df, versao):
+    """
+    Grava a versão no DataFrame junto com a impressão das suas linhas. Um recorte
+    df[mascara] herda os attrs do original, mas não as linhas: a impressão deixa de
+    bater e a versão herdada é ignorada (ver versao_dos_dados).
+    """
+    df.attrs["versao"] = versao
+    df.attrs["indice_versao"] = None if versao is None else impressao_indice(df.index)
+    return df
+
+def versionar_recorte(recorte, origem, filtro):
+    """Versão do recorte = versão da origem + "|filtro"; sem versão se a origem não tiver"""
+    versao = versao_dos_dados(origem)
+    return versionar(recorte, None if versao is None else f"{versao}|{filtro}")
+
+def versao_dos_dados(dados):
+    """
+    Versão de um DataFrame (attrs["versao"], gravada com versionar) ou de um cubo
+    (.versao); None se não houver ou se a versão foi herdada de outro recorte.
+    """
+    if isinstance(dados, pd.DataFrame):
+        versao = dados.attrs.get("versao")
+        if versao is None or dados.attrs.get("indice_versao") != impressao_indice(dados.index):
+            return None
+        return versao
+    return getattr(dados, "versao", None)
+
+def em_cache_por_versao(recurso=False, max_entries=MAXIMO_VERSOES):
+    """
+    Decora funcao(dados, ...) para calcular o resultado uma vez por versão dos dados
+    e demais argumentos. Com recurso=True o objeto é compartilhado entre sessões
+    (st.cache_resource); senão, cada leitura recebe uma cópia (st.cache_data).
+    Dados sem versão não têm como ser identificados: o cálculo é feito direto.
+    """
+    def decorar(funcao):
+        assinatura = inspect.signature(funcao)
+
+        def calcular(versao, args, kwargs, _dados):
+            return funcao(_dados, *args, **kwargs)
+
+        # O Streamlit separa os caches pelo módulo e nome qualificado da função
+        calcular.__module__ = funcao.__module__
+        calcular.__qualname__ = f"{funcao.__qualname__}.em_cache"
+        cache = (st.cache_resource if recurso else st.cache_data)(max_entries=max_entries)(calcular)
+
+        @functools.wraps(funcao)
+        def envoltorio(dados, *args, **kwargs):
+            versao = versao_dos_dados(dados)
+            if versao is None:
+                return funcao(dados, *args, **kwargs)
+            # Argumentos com os padrões preenchidos: f(df) e f(df, padrao) usam a mesma entrada
+            argumentos = assinatura.bind(dados, *args, **kwargs)
+            argumentos.apply_defaults()
+            return cache(versao, argumentos.args[1:], argumentos.kwargs, dados)
+
+        return envoltorio
+    return decorar
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Feriados de data fixa: nacionais, estadual de SP (9 de julho) e da capital
+# (25 de janeiro; 20 de novembro, nacional a partir de 2024)
+FERIADOS_FIXOS = {
+    (1, 1): "Confraternização Universal",
+    (1, 25): "Aniversário de São Paulo",
+    (4, 21): "Tiradentes",
+    (5, 1): "Dia do Trabalho",
+    (7, 9): "Revolução Constitucionalista",
+    (9, 7): "Independência do Brasil",
+    (10, 12): "Nossa Senhora Aparecida",
+    (11, 2): "Finados",
+    (11, 15): "Proclamação da República",
+    (11, 20): "Dia da Consciência Negra",
+    (12, 25): "Natal",
+}
+
+# Feriados móveis, em dias a partir do domingo de Páscoa
+FERIADOS_MOVEIS = {
+    -48: "Carnaval (segunda-feira)",
+    -47: "Carnaval (terça-feira)",
+    -2: "Sexta-feira Santa",
+    60: "Corpus Christi",
+}
+
+def pascoa(ano):
+    """Domingo de Páscoa no calendário gregoriano (algoritmo de Meeus/Jones/Butcher)"""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes = (h + l - 7 * m + 114) // 31
+    dia = (h + l - 7 * m + 114) % 31 + 1
+    return date(ano, mes, dia)
+
+def feriados(anos):
+    """Feriados (nacionais, de SP e da capital) dos anos pedidos: pd.Series data -> nome"""
+    datas = {}
+    for ano in anos:
+        for (mes, dia), nome in FERIADOS_FIXOS.items():
+            datas[date(ano, mes, dia)] = nome
+        domingo = pascoa(ano)
+        for deslocamento, nome in FERIADOS_MOVEIS.items():
+            datas[domingo + timedelta(days=deslocamento)] = nome
+    serie = pd.Series(datas, dtype=object).sort_index()
+    serie.index = pd.DatetimeIndex(serie.index)
+    return serie
+
+def marcar_feriados(datas):
+    """Máscara booleana das datas (Series datetime) que caem em feriado"""
+    anos = datas.dt.year.dropna().unique()
+    dias = datas.dt.normalize().to_numpy()
+    return np.isin(dias, feriados(int(ano) for ano in anos).index.to_numpy())
@@ -0,0 +1,45 @@
+import pandas as pd
+
+from cache_versao import em_cache_por_versao
+
+# Colunas derivadas disponíveis: nome -> função que calcula a coluna a partir do DataFrame
+COLUNAS_DERIVADAS = {}
+
+def coluna_derivada(nome):
+    """Registra a função decorada como calculadora da coluna derivada `nome`"""
+    def registrar(funcao):
+        COLUNAS_DERIVADAS[nome] = funcao
+        return funcao
+    return registrar
+
+@coluna_derivada("Ano")
+def _ano(df):
+    return df["Data do Sinistro"].dt.year.astype("Int16")
+
+@coluna_derivada("Mês")
+def _mes(df):
+    return df["Data do Sinistro"].dt.month.astype("Int8")
+
+@coluna_derivada("Ano/Mês")
+def _ano_mes(df):
+    return df["Data do Sinistro"].dt.to_period("M").astype("category")
+
+@coluna_derivada("Data")
+def _data(df):
+    return df["Data do Sinistro"].dt.normalize()
+
+# Cada leitura recebe uma cópia (st.cache_data): alterar a coluna recebida não muda
+# o que as outras sessões leem, seja qual for o tipo (Int16, category, datetime)
+@em_cache_por_versao()
+def _calcular(df, nome):
+    return pd.Series(COLUNAS_DERIVADAS[nome](df), index=df.index, name=nome)
+
+def coluna(df, nome):
+    """
+    Coluna `nome` do recorte sem copiar o DataFrame. Colunas gravadas no snapshot
+    vêm direto do df; as registradas em COLUNAS_DERIVADAS são calculadas na primeira
+    vez por recorte dos dados; cada chamada recebe uma cópia da coluna em cache.
+    """
+    if nome in df.columns:
+        return df[nome]
+    return _calcular(df, nome)
@@ -1,5 +1,33 @@
 import streamlit as st
 
+# --- Configurações do Mapa ---
+MAP_ZOOM = 12
+
+# Centro padrão (trecho da Raposo Tavares em São Paulo), usado quando o recorte não tem pontos
+MAP_CENTER = [-23.5833, -46.7694]
+
+# Configurações para o HeatMap de motocicletas
+MOTOCYCLIST_HEATMAP_CONFIG = {
+    "radius": 15,
+    "blur": 20,
+    "min_opacity": 0.5,
+    "max_zoom": 15
+}
+
+# Configurações para o HeatMap geral
+GENERAL_HEATMAP_CONFIG = {
+    "radius": 10,
+    "blur": 15,
+}
+
+# Modo de renderização do mapa de calor: "pontos" (HeatMap no navegador),
+# "raster" (imagem calculada no servidor) ou "auto" (raster acima do limite de células)
+HEATMAP_MODO = "auto"
+LIMITE_PONTOS_HEATMAP = 20000
+# No modo raster, só vão para o navegador os níveis de rótulos com até este número de
+# células; nos zooms mais próximos valem os rótulos do nível mais fino enviado
+LIMITE_ROTULOS_NIVEL = 2000
+
 def configurar_pagina():
     # Configurar a página
     st.set_page_config(
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from cache_versao import em_cache_por_versao, versao_dos_dados
+from data import VEICULOS
+
+# Eixos do cubo, na ordem em que aparecem nos arrays
+DIMENSOES = ("ano", "mes", "dia_semana", "hora", "logradouro")
+
+# Rótulo da posição extra que recebe os sinistros sem data, hora ou logradouro
+NAO_INFORMADO = "Não informado"
+
+def _com_nao_informado(eixo, ausentes):
+    """Acrescenta a posição NAO_INFORMADO ao fim do eixo quando há valores ausentes"""
+    return eixo.append(pd.Index([NAO_INFORMADO], name=eixo.name)) if ausentes else eixo
+
+def _menor_tipo(array):
+    """Reduz o array de contagens ao menor tipo inteiro sem sinal que o comporta"""
+    maximo = int(array.max()) if array.size else 0
+    return array.astype(np.min_scalar_type(maximo))
+
+class CuboSinistros:
+    """
+    Contagens densas de sinistros por ano × mês × dia da semana × hora × logradouro,
+    e soma de veículos envolvidos por tipo no mesmo recorte.
+
+    O cubo é montado uma vez na carga; as abas fazem recortes (fatiar) e
+    agregações (somar) sobre arrays pequenos em vez de varrer as linhas.
+    """
+
+    def __init__(self, contagens, veiculos, eixos, versao=None):
+        self.contagens = contagens  # shape (ano, mes, dia_semana, hora, logradouro)
+        self.veiculos = veiculos    # mesmo shape + eixo final com os tipos de VEICULOS
+        self.eixos = eixos          # dimensão -> pd.Index com os rótulos de cada posição
+        self.versao = versao        # versão dos dados + recortes aplicados, usada como chave de cache
+
+    @classmethod
+    def construir(cls, df):
+        """Monta o cubo em uma passada com np.bincount sobre índices achatados"""
+        datas = df["Data do Sinistro"]
+        horas = df["Hora do Sinistro"]
+        logradouros = df["Logradouro"].astype("category")
+
+        # Nenhuma linha fica fora do cubo: data, hora ou logradouro ausentes vão para a
+        # posição NAO_INFORMADO (criada só quando há ausentes), no fim do eixo
+        sem_data = datas.isna().to_numpy()
+        sem_hora = horas.isna().to_numpy()
+        if logradouros.isna().any():
+            if NAO_INFORMADO not in logradouros.cat.categories:
+                logradouros = logradouros.cat.add_categories(NAO_INFORMADO)
+            logradouros = logradouros.fillna(NAO_INFORMADO)
+
+        anos = np.sort(datas.dt.year.dropna().unique().astype(int))
+        eixos = {
+            "ano": _com_nao_informado(pd.Index(anos, name="ano"), sem_data.any()),
+            "mes": _com_nao_informado(pd.RangeIndex(1, 13, name="mes"), sem_data.any()),
+            "dia_semana": _com_nao_informado(pd.RangeIndex(0, 7, name="dia_semana"), sem_data.any()),
+            "hora": _com_nao_informado(pd.RangeIndex(0, 24, name="hora"), sem_hora.any()),
+            "logradouro": pd.Index(logradouros.cat.categories, name="logradouro"),
+        }
+        shape = tuple(len(eixos[dim]) for dim in DIMENSOES)
+
+        codigos = (
+            np.where(sem_data, len(anos), np.searchsorted(anos, datas.dt.year.fillna(0).to_numpy())),
+            np.where(sem_data, 12, datas.dt.month.fillna(1).to_numpy(dtype=np.intp) - 1),
+            np.where(sem_data, 7, df["Dia da Semana"].to_numpy()),
+            np.where(sem_hora, 24, horas.fillna(0).to_numpy(dtype=np.intp)),
+            logradouros.cat.codes.to_numpy(),
+        )
+        indice = np.ravel_multi_index(codigos, shape)
+        tamanho = int(np.prod(shape))
+
+        contagens = np.bincount(indice, minlength=tamanho).reshape(shape)
+        veiculos = np.stack([
+            np.bincount(indice, weights=df[veiculo].to_numpy(), minlength=tamanho)
+            for veiculo in VEICULOS
+        ], axis=-1).reshape(shape + (len(VEICULOS),))
+
+        return cls(_menor_tipo(contagens), _menor_tipo(veiculos), eixos, versao_dos_dados(df))
+
+    @property
+    def total(self):
+        return int(self.contagens.sum())
+
+    def fatiar(self, **filtros):
+        """
+        Recorte do cubo mantendo apenas os rótulos informados em cada dimensão.
+        Ex.: cubo.fatiar(ano=range(2021, 2024), dia_semana=[5, 6])
+        """
+        contagens, veiculos, eixos = self.contagens, self.veiculos, dict(self.eixos)
+        versao = self.versao
+        for dim, valores in filtros.items():
+            eixo = DIMENSOES.index(dim)
+            posicoes = eixos[dim].get_indexer(list(valores))
+            posicoes = posicoes[posicoes >= 0]
+            contagens = np.take(contagens, posicoes, axis=eixo)
+            veiculos = np.take(veiculos, posicoes, axis=eixo)
+            eixos[dim] = eixos[dim][posicoes]
+            versao = f"{versao}|{dim}={eixos[dim].tolist()}"
+
+        # Posições NAO_INFORMADO que o recorte esvaziou (ex.: sem data, fora dos anos) saem
+        for eixo, dim in enumerate(DIMENSOES):
+            if eixos[dim][-1:].equals(pd.Index([NAO_INFORMADO])) and not np.take(contagens, -1, axis=eixo).any():
+                contagens = np.delete(contagens, -1, axis=eixo)
+                veiculos = np.delete(veiculos, -1, axis=eixo)
+                eixos[dim] = eixos[dim][:-1]
+        return CuboSinistros(contagens, veiculos, eixos, versao)
+
+    def informados(self, dim):
+        """Rótulos da dimensão sem a posição NAO_INFORMADO (sempre a última, se existir)"""
+        eixo = self.eixos[dim]
+        return eixo[:-1] if eixo[-1:].equals(pd.Index([NAO_INFORMADO])) else eixo
+
+    def _somente_informados(self, dados, dims):
+        for dim in dims:
+            quantidade = len(self.informados(dim))
+            dados = np.take(dados, range(quantidade), axis=DIMENSOES.index(dim))
+        return dados
+
+    def somar(self, por=(), veiculos=False, informados=False):
+        """
+        Agrega o cubo mantendo as dimensões em `por`.
+
+        Retorna uma Series de contagens de sinistros ou, com veiculos=True, um
+        DataFrame com uma coluna por tipo de veículo. Sem `por`, o total geral
+        (sempre igual ao número de linhas do recorte). Com informados=True, as
+        posições NAO_INFORMADO das dimensões em `por` ficam de fora.
+        """
+        if isinstance(por, str):
+            por = (por,)
+        dados = self.veiculos if veiculos else self.contagens
+        if informados:
+            dados = self._somente_informados(dados, por)
+        eixos_soma = tuple(i for i, dim in enumerate(DIMENSOES) if dim not in por)
+        resultado = dados.sum(axis=eixos_soma, dtype=np.int64)
+
+        # Reordenar os eixos restantes na ordem pedida em `por`
+        restantes = [dim for dim in DIMENSOES if dim in por]
+        ordem = [restantes.index(dim) for dim in por]
+        if veiculos:
+            ordem.append(len(por))
+        resultado = np.transpose(resultado, ordem)
+
+        if not por:
+            return pd.Series(resultado, index=VEICULOS) if veiculos else int(resultado)
+        eixos = [self.informados(dim) if informados else self.eixos[dim] for dim in por]
+        if len(por) == 1:
+            indice = eixos[0]
+        else:
+            indice = pd.MultiIndex.from_product(eixos)
+
+        if veiculos:
+            return pd.DataFrame(resultado.reshape(-1, len(VEICULOS)), index=indice, columns=VEICULOS)
+        return pd.Series(resultado.reshape(-1), index=indice)
+
+    def por_mes(self, por=None):
+        """
+        Sinistros por mês do calendário (PeriodIndex "Ano/Mês") do primeiro ao último
+        mês com registro; meses sem registro nesse intervalo entram com zero. Sem
+        `por`, uma Series; com `por` (ex.: "logradouro"), um DataFrame meses × rótulos
+        da dimensão. Sinistros sem data ficam de fora.
+        """
+        anos, meses = self.informados("ano"), self.informados("mes")
+        colunas = self.eixos[por] if por else pd.Index([0])
+        dados = self._somente_informados(self.contagens, ("ano", "mes"))
+        eixos_soma = tuple(i for i, dim in enumerate(DIMENSOES) if dim not in ("ano", "mes", por))
+        grade = dados.sum(axis=eixos_soma, dtype=np.int64).reshape(len(anos) * len(meses), len(colunas))
+
+        indice = pd.PeriodIndex(
+            [pd.Period(year=int(ano), month=int(mes), freq="M") for ano in anos for mes in meses],
+            freq="M", name="Ano/Mês"
+        )
+        observados = np.flatnonzero(grade.sum(axis=1))
+        if len(observados):
+            intervalo = pd.period_range(indice[observados[0]], indice[observados[-1]], freq="M", name="Ano/Mês")
+        else:
+            intervalo = pd.PeriodIndex([], freq="M", name="Ano/Mês")
+        tabela = pd.DataFrame(grade, index=indice, columns=colunas).reindex(intervalo, fill_value=0)
+        return tabela if por else tabela[0].rename(None)
+
+    def matriz_dia_hora(self, veiculos=False):
+        """
+        Matriz de incidência dia da semana (0 = segunda) × hora como array 7×24, ou
+        7×24×tipos de veículo com veiculos=True. Soma direta dos eixos do cubo, que já
+        foi montado com um único np.bincount sobre os códigos inteiros. Só entram
+        dias e horas informados (linhas de rótulo cubo.informados(dim)).
+        """
+        dados = self._somente_informados(self.veiculos if veiculos else self.contagens, ("dia_semana", "hora"))
+        eixos_soma = tuple(i for i, dim in enumerate(DIMENSOES) if dim not in ("dia_semana", "hora"))
+        return dados.sum(axis=eixos_soma, dtype=np.int64)
+
+@em_cache_por_versao(recurso=True)
+def construir_cubo(df):
+    """Cubo do dataset, montado uma vez por recorte dos dados e compartilhado entre sessões"""
+    return CuboSinistros.construir(df)
@@ -1,14 +1,20 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
 import pandas as pd
+import pyarrow.feather as feather
 import streamlit as st
 
-@st.cache_data
-def load_data():
-    file_path = "raposo_nao_fatal.xlsx"    
-    df = pd.read_excel(file_path, sheet_name="Planilha1")
-    df.head(3)
-    df["Data do Sinistro"] = pd.to_datetime(df["Data do Sinistro"], errors="coerce")
-    df["Hora do Sinistro"] = pd.to_datetime(df["Hora do Sinistro"], format='%H:%M:%S', errors="coerce").dt.hour
-    return df
+from cache_versao import versionar, versionar_recorte
+from calendario import marcar_feriados
+from colunas import coluna
+from rodovia import ARQUIVO_RODOVIA, projetar_na_rodovia
+
+# Planilha de origem e diretório onde fica o snapshot colunar
+ARQUIVO_DADOS = "raposo_nao_fatal.xlsx"
+DIRETORIO_CACHE = Path(".cache")
 
 # Constantes
 VEICULOS = [
@@ -21,8 +27,170 @@ VEICULOS = [
     "Veículo envolvido não disponível"
 ]
 
-def preparar_dados_veiculos(df_filtrado):
-    # Preparar dados para gráficos de veículos
-    relacao_logradouro_veiculos = df_filtrado.groupby("Logradouro")[VEICULOS].sum()
+# Schema compacto aplicado uma única vez na carga. Contadores e flags cabem em
+# uint8; coordenadas em float32 (precisão de ~0,5 m, suficiente para os mapas)
+SCHEMA = {
+    "Dia do Sinistro": "uint8",
+    "Mês do Sinistro": "uint8",
+    "Ano do Sinistro": "uint16",
+    "Ano/Mês do Sinistro": "category",
+    "latitude": "float32",
+    "longitude": "float32",
+    "Hora do Sinistro": "int8",
+    "Município": "category",
+    "Região Administrativa": "category",
+    "Logradouro": "category",
+    "Pedestre envolvido": "uint8",
+    **{veiculo: "uint8" for veiculo in VEICULOS},
+    "Atropelamento": "uint8",
+    "Choque": "uint8",
+    "Colisão": "uint8",
+    "Outros": "uint8",
+    "Não Disponível": "uint8",
+    "Tipo de registro": "category",
+    "KM": "float32",
+    "KM projetado": "float32",
+    "Afastamento (m)": "float32",
+    "Dia da Semana": "int8",
+    "Feriado": "bool",
+}
+
+# Trecho da rodovia (km inicial, km final) coberto por cada planilha. Fora dele,
+# "Numero/KM" é número de endereço ("100", "509") ou da rodovia ("270", SP 270), não KM
+FAIXAS_KM = {"raposo_nao_fatal.xlsx": (0, 40)}
+# Planilha sem trecho cadastrado: extensão das rodovias estaduais
+FAIXA_KM_PADRAO = (0, 700)
+
+# Versão do formato do snapshot; mudar o SCHEMA ou o tratamento das colunas exige incrementá-la
+VERSAO_SNAPSHOT = 8
+
+# Versão completa do formato: também leva um hash do SCHEMA, para que incluir ou
+# remover colunas invalide o snapshot mesmo se VERSAO_SNAPSHOT não for incrementada
+VERSAO_FORMATO = f"{VERSAO_SNAPSHOT}.{hashlib.sha256(repr(sorted(SCHEMA.items())).encode()).hexdigest()[:8]}"
+
+# Fingerprints já calculados, por (caminho, mtime, tamanho)
+_fingerprints = {}
+
+def calcular_fingerprint(file_path):
+    """Hash do conteúdo da planilha, usado como versão do dataset"""
+    stat = os.stat(file_path)
+    chave = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    if chave not in _fingerprints:
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+                sha.update(bloco)
+        _fingerprints[chave] = sha.hexdigest()[:16]
+    return _fingerprints[chave]
+
+def normalizar_coordenada(coluna):
+    """Converte coordenadas com vírgula decimal ("-23,58") para número"""
+    if pd.api.types.is_numeric_dtype(coluna):
+        return coluna
+    return pd.to_numeric(coluna.astype(str).str.replace(",", "."), errors="coerce")
+
+def converter_km(coluna, faixa=FAIXA_KM_PADRAO):
+    """
+    "Numero/KM" -> quilometragem numérica (km). Aceita números, vírgula decimal
+    ("23,5") e a notação "km 23+500"; valores fora da `faixa` (km inicial, km final)
+    viram NaN.
+    """
+    if pd.api.types.is_numeric_dtype(coluna):
+        km = coluna.astype("float64")
+    else:
+        texto = coluna.astype(str).str.lower().str.replace("km", "", regex=False).str.strip()
+        partes = texto.str.extract(r"^(\d+(?:[.,]\d+)?)(?:\s*\+\s*(\d+))?$")
+        km = pd.to_numeric(partes[0].str.replace(",", "."), errors="coerce")
+        km = km + pd.to_numeric(partes[1], errors="coerce").fillna(0) / 1000
+    return km.where(km.between(*faixa))
+
+def adicionar_calendario(df):
+    """
+    Colunas de calendário calculadas uma vez na carga: dia da semana (0 = segunda,
+    -1 = sem data) e feriado (nacional, estadual de SP ou da capital).
+    """
+    datas = df["Data do Sinistro"]
+    df["Dia da Semana"] = datas.dt.dayofweek.fillna(-1).astype("int8")
+    df["Feriado"] = marcar_feriados(datas)
+    return df
+
+def aplicar_schema(df):
+    """Aplica o SCHEMA às colunas presentes no DataFrame"""
+    for coluna, tipo in SCHEMA.items():
+        if coluna not in df.columns:
+            continue
+        serie = df[coluna]
+        if coluna in ("latitude", "longitude"):
+            serie = normalizar_coordenada(serie)
+        if tipo.startswith(("int", "uint")) and serie.isna().any():
+            if coluna == "Hora do Sinistro":
+                # Hora ausente continua ausente; o tipo inteiro não representa NaN
+                df[coluna] = serie.astype("float32")
+                continue
+            # Contador vazio equivale a nenhum veículo envolvido
+            serie = serie.fillna(0)
+        df[coluna] = serie.astype(tipo)
+    return df
+
+def ler_planilha(file_path):
+    """Lê e trata a planilha original (caminho lento, via openpyxl)"""
+    df = pd.read_excel(file_path, sheet_name="Planilha1")
+    df["Data do Sinistro"] = pd.to_datetime(df["Data do Sinistro"], errors="coerce")
+    df["Hora do Sinistro"] = pd.to_datetime(df["Hora do Sinistro"], format='%H:%M:%S', errors="coerce").dt.hour
+    if "Numero/KM" in df.columns:
+        df["KM"] = converter_km(df["Numero/KM"], FAIXAS_KM.get(Path(file_path).name, FAIXA_KM_PADRAO))
+    df = aplicar_schema(adicionar_calendario(df))
+    # KM pelas coordenadas (já normalizadas) projetadas no traçado da rodovia
+    return aplicar_schema(projetar_na_rodovia(df))
+
+def carregar_snapshot(file_path, fingerprint):
+    """Carrega o snapshot Arrow da planilha, recriando-o se a planilha mudou"""
+    caminho = DIRETORIO_CACHE / f"{Path(file_path).stem}-{fingerprint}-v{VERSAO_FORMATO}.arrow"
+    if caminho.exists():
+        try:
+            # Arquivo sem compressão: a tabela Arrow é lida do arquivo mapeado em memória,
+            # mas to_pandas copia as colunas para o DataFrame (não é leitura sem cópia)
+            return feather.read_table(caminho, memory_map=True).to_pandas()
+        except Exception:
+            # Snapshot corrompido ou de versão incompatível: recriar
+            caminho.unlink(missing_ok=True)
+
+    df = ler_planilha(file_path)
+    DIRETORIO_CACHE.mkdir(exist_ok=True)
+    # Nome temporário único: réplicas iniciando juntas não escrevem no mesmo arquivo
+    temporario = caminho.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+    feather.write_feather(df, temporario, compression="uncompressed")
+    os.replace(temporario, caminho)
+
+    # Remover snapshots de versões anteriores da planilha
+    for antigo in DIRETORIO_CACHE.glob(f"{Path(file_path).stem}-*.arrow"):
+        if antigo != caminho:
+            antigo.unlink(missing_ok=True)
+    return df
+
+# A planilha atual e a anterior (sessões abertas durante a troca de planilha)
+@st.cache_data(max_entries=2)
+def _load_data(file_path, fingerprint):
+    df = carregar_snapshot(file_path, fingerprint)
+    return versionar(df, f"{fingerprint}-v{VERSAO_FORMATO}")
+
+def load_data(file_path=ARQUIVO_DADOS):
+    # O fingerprint entra na chave do cache: planilha nova invalida o cache.
+    # O traçado da rodovia também, pois o KM projetado fica no snapshot
+    fingerprint = calcular_fingerprint(file_path)
+    if os.path.exists(ARQUIVO_RODOVIA):
+        fingerprint = f"{fingerprint}-{calcular_fingerprint(ARQUIVO_RODOVIA)[:8]}"
+    return _load_data(file_path, fingerprint)
+
+def filtrar_periodo(df, ano_inicio, ano_fim):
+    """Recorte por ano; a versão do recorte identifica o filtro nos caches"""
+    anos = coluna(df, "Ano")
+    df_filtrado = df[((anos >= ano_inicio) & (anos <= ano_fim)).to_numpy(dtype=bool, na_value=False)]
+    return versionar_recorte(df_filtrado, df, f"ano={ano_inicio}-{ano_fim}")
+
+def preparar_dados_veiculos(cubo):
+    # Preparar dados para gráficos de veículos a partir do cubo de agregação
+    relacao_logradouro_veiculos = cubo.somar("logradouro", veiculos=True)
+    relacao_logradouro_veiculos.index.name = "Logradouro"
     relacao_logradouro_veiculos["Total de Veículos"] = relacao_logradouro_veiculos.sum(axis=1)
-    return relacao_logradouro_veiculos.sort_values(by="Total de Veículos", ascending=False).head(10)
\ No newline at end of file
+    return relacao_logradouro_veiculos.sort_values(by="Total de Veículos", ascending=False).head(10)
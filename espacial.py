@@ -0,0 +1,262 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from cache_versao import em_cache_por_versao, versionar_recorte
+from config import MAP_CENTER
+from colunas import coluna
+
+# Lado padrão das células da grade, em graus (~22 m de latitude)
+RESOLUCAO_CELULA = 0.0002
+
+# Tamanho de um pixel do mapa no zoom 0, em coordenadas de Mercator (radianos)
+PIXEL_MERCATOR_Z0 = 2 * np.pi / 256
+
+# Maior lado da imagem rasterizada, em pixels
+LIMITE_PIXELS_RASTER = 2048
+
+# Níveis de zoom da pirâmide de células e lado de cada célula na tela, em pixels
+ZOOM_MIN_PIRAMIDE = 8
+ZOOM_MAX_PIRAMIDE = 18
+TAMANHO_CELULA_PX = 40
+
+def _chaves_celulas(latitudes, longitudes, resolucao):
+    """Uma chave inteira por célula da grade, e o total de chaves possíveis"""
+    linhas = np.floor(latitudes / resolucao).astype(np.int64)
+    colunas = np.floor(longitudes / resolucao).astype(np.int64)
+    linhas -= linhas.min()
+    colunas -= colunas.min()
+    largura = colunas.max() + 1
+    return linhas * largura + colunas, (linhas.max() + 1) * largura
+
+def _agregar(chaves, latitudes, longitudes, pesos):
+    """Soma dos pesos e centróide ponderado por chave; np.unique agrupa em O(n log n)"""
+    unicas, celula = np.unique(chaves, return_inverse=True)
+    contagem = np.bincount(celula, weights=pesos)
+    return unicas, pd.DataFrame({
+        "latitude": np.bincount(celula, weights=latitudes * pesos) / contagem,
+        "longitude": np.bincount(celula, weights=longitudes * pesos) / contagem,
+        "count": np.rint(contagem).astype(np.int64)
+    })
+
+def _pontos_validos(latitudes, longitudes, pesos=None, *extras):
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    pesos = np.ones_like(latitudes) if pesos is None else np.asarray(pesos, dtype=np.float64)
+    validos = np.isfinite(latitudes) & np.isfinite(longitudes)
+    return [latitudes[validos], longitudes[validos], pesos[validos]] + [np.asarray(extra)[validos] for extra in extras]
+
+def agrupar_em_celulas(latitudes, longitudes, resolucao=RESOLUCAO_CELULA, pesos=None):
+    """
+    Agrega pontos em células de uma grade regular de `resolucao` graus.
+
+    Retorna um DataFrame com uma linha por célula ocupada: o centróide dos pontos
+    da célula (latitude, longitude) e a quantidade de sinistros (count). Com
+    `pesos`, cada ponto conta como seu peso (ex.: células de um nível mais fino).
+    """
+    latitudes, longitudes, pesos = _pontos_validos(latitudes, longitudes, pesos)
+    if latitudes.size == 0:
+        return pd.DataFrame({"latitude": [], "longitude": [], "count": []})
+
+    chaves, _ = _chaves_celulas(latitudes, longitudes, resolucao)
+    return _agregar(chaves, latitudes, longitudes, pesos)[1]
+
+def agrupar_em_quadros(latitudes, longitudes, quadros, resolucao=RESOLUCAO_CELULA):
+    """
+    Células de todos os quadros de uma animação (mês, hora do dia...) em uma passada.
+
+    `quadros` traz o código do quadro de cada ponto (-1 = fora da animação). A chave
+    combinada quadro × células + célula agrupa tudo com um único np.unique. Retorna
+    as colunas de agrupar_em_celulas mais "quadro", ordenado por quadro.
+    """
+    latitudes, longitudes, pesos, quadros = _pontos_validos(latitudes, longitudes, None, quadros)
+    dentro = quadros >= 0
+    latitudes, longitudes, pesos, quadros = latitudes[dentro], longitudes[dentro], pesos[dentro], quadros[dentro]
+    if latitudes.size == 0:
+        return pd.DataFrame({"quadro": [], "latitude": [], "longitude": [], "count": []})
+
+    chaves, total_celulas = _chaves_celulas(latitudes, longitudes, resolucao)
+    unicas, celulas = _agregar(quadros.astype(np.int64) * total_celulas + chaves, latitudes, longitudes, pesos)
+    celulas.insert(0, "quadro", unicas // total_celulas)
+    return celulas
+
+def centro_celulas(celulas):
+    """Centro do mapa: média das coordenadas ponderada pela contagem das células"""
+    if not len(celulas) or celulas["count"].sum() == 0:
+        return list(MAP_CENTER)
+    return [
+        float(np.average(celulas["latitude"], weights=celulas["count"])),
+        float(np.average(celulas["longitude"], weights=celulas["count"]))
+    ]
+
+def mercator_y(latitudes):
+    """Latitude em graus -> coordenada y de Web Mercator (radianos)"""
+    return np.log(np.tan(np.pi / 4 + np.radians(latitudes) / 2))
+
+def latitude_mercator(y):
+    """Coordenada y de Web Mercator -> latitude em graus"""
+    return np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2)
+
+def desfocar(imagem, sigma):
+    """Desfoque gaussiano aplicado no domínio da frequência (FFT), com borda zerada"""
+    margem = int(np.ceil(3 * sigma))
+    imagem = np.pad(imagem, margem)
+    freq_y = np.fft.fftfreq(imagem.shape[0])[:, None]
+    freq_x = np.fft.rfftfreq(imagem.shape[1])[None, :]
+    filtro = np.exp(-2 * np.pi ** 2 * sigma ** 2 * (freq_x ** 2 + freq_y ** 2))
+    resultado = np.fft.irfft2(np.fft.rfft2(imagem) * filtro, s=imagem.shape)
+    return resultado[margem:imagem.shape[0] - margem, margem:imagem.shape[1] - margem]
+
+def rasterizar_densidade(latitudes, longitudes, pesos, radius, blur, zoom, limite_pixels=LIMITE_PIXELS_RASTER):
+    """
+    Superfície de densidade em uma grade de pixels de Web Mercator no nível de `zoom`.
+
+    Os pontos são somados com np.histogram2d e suavizados por um kernel gaussiano
+    que cobre radius + blur pixels, como o raio de cada ponto no HeatMap do
+    navegador. Retorna (densidade, limites): a densidade é medida em "pontos
+    sobrepostos" (1 = pico de um sinistro isolado), com a linha 0 no norte, e os
+    limites no formato [[sul, oeste], [norte, leste]] usado pelo ImageOverlay.
+    """
+    x = np.radians(np.asarray(longitudes, dtype=np.float64))
+    y = mercator_y(np.asarray(latitudes, dtype=np.float64))
+    pesos = np.asarray(pesos, dtype=np.float64)
+
+    # Pixel do zoom pedido, ampliado se a imagem passar do limite de tamanho
+    pixel = PIXEL_MERCATOR_Z0 / 2 ** zoom
+    margem = (radius + blur) * pixel
+    x_min, x_max = x.min() - margem, x.max() + margem
+    y_min, y_max = y.min() - margem, y.max() + margem
+    escala = max(1.0, max(x_max - x_min, y_max - y_min) / pixel / limite_pixels)
+    pixel *= escala
+
+    largura = max(1, int(np.ceil((x_max - x_min) / pixel)))
+    altura = max(1, int(np.ceil((y_max - y_min) / pixel)))
+    x_max, y_max = x_min + largura * pixel, y_min + altura * pixel
+    densidade, _, _ = np.histogram2d(
+        y, x, bins=(altura, largura), range=[[y_min, y_max], [x_min, x_max]], weights=pesos
+    )
+    sigma = (radius + blur) / 3 / escala
+    densidade = desfocar(densidade[::-1], sigma)
+
+    # Densidade em unidades do pico de um sinistro isolado
+    kernel = np.exp(-0.5 * (np.arange(-3 * sigma, 3 * sigma + 1) / sigma) ** 2)
+    densidade /= (1 / kernel.sum()) ** 2
+
+    limites = [
+        [float(latitude_mercator(y_min)), float(np.degrees(x_min))],
+        [float(latitude_mercator(y_max)), float(np.degrees(x_max))]
+    ]
+    return np.clip(densidade, 0, None), limites
+
+def resolucao_zoom(zoom, tamanho_px=TAMANHO_CELULA_PX):
+    """Lado, em graus, de uma célula que ocupa `tamanho_px` pixels no nível de zoom"""
+    return tamanho_px * 360 / (256 * 2 ** zoom)
+
+def piramide_celulas(latitudes, longitudes, zoom_min=ZOOM_MIN_PIRAMIDE, zoom_max=ZOOM_MAX_PIRAMIDE, pesos=None):
+    """
+    Células agregadas para cada nível de zoom, do mais aproximado ao mais afastado.
+
+    O nível mais fino é calculado a partir dos pontos; cada nível seguinte agrega
+    as células do anterior (ponderadas pela contagem), então o custo total fica
+    dominado pela primeira passada. Retorna {zoom: DataFrame de células}.
+    """
+    niveis = {}
+    celulas = agrupar_em_celulas(latitudes, longitudes, resolucao_zoom(zoom_max), pesos=pesos)
+    for zoom in range(zoom_max, zoom_min - 1, -1):
+        if zoom != zoom_max:
+            celulas = agrupar_em_celulas(
+                celulas["latitude"], celulas["longitude"], resolucao_zoom(zoom), pesos=celulas["count"]
+            )
+        niveis[zoom] = celulas
+    return niveis
+
+def filtrar_veiculo(df, veiculo=None):
+    """Sinistros com o tipo de veículo envolvido (todos, se veiculo=None)"""
+    if veiculo is None:
+        return df
+    return versionar_recorte(df[df[veiculo] > 0], df, f"veiculo={veiculo}")
+
+@em_cache_por_versao()
+def celulas_sinistros(df, veiculo=None, resolucao=RESOLUCAO_CELULA):
+    """Células ponderadas do recorte (em cache por versão dos dados e filtro)"""
+    df = filtrar_veiculo(df, veiculo)
+    return agrupar_em_celulas(df["latitude"], df["longitude"], resolucao)
+
+@em_cache_por_versao()
+def piramide_sinistros(df, veiculo=None):
+    """Pirâmide de células do recorte (em cache por versão dos dados e filtro)"""
+    df = filtrar_veiculo(df, veiculo)
+    return piramide_celulas(df["latitude"], df["longitude"])
+
+def codigos_quadros(df, por="mes"):
+    """
+    Código do quadro da animação de cada sinistro e o rótulo de cada quadro:
+    por="mes" usa o ano/mês da data ("2021-01"...), por="hora" a hora do dia (0 a 23).
+    """
+    if por == "mes":
+        categorias = coluna(df, "Ano/Mês").cat
+        rotulos = [str(mes) for mes in categorias.categories]
+        return categorias.codes.to_numpy(), rotulos
+    if por == "hora":
+        horas = df["Hora do Sinistro"].to_numpy(dtype=np.float64)
+        return np.where(np.isnan(horas), -1, horas).astype(np.int64), list(range(24))
+    raise ValueError(f"Quadro desconhecido: {por}")
+
+@em_cache_por_versao()
+def quadros_sinistros(df, por="mes", veiculo=None):
+    """
+    (rótulos, células por quadro) da animação do recorte, em cache por versão dos
+    dados e filtro. As células do quadro i têm quadro == i.
+    """
+    df = filtrar_veiculo(df, veiculo)
+    codigos, rotulos = codigos_quadros(df, por)
+    return rotulos, agrupar_em_quadros(df["latitude"], df["longitude"], codigos)
+
+def pontos_no_poligono(latitudes, longitudes, vertices):
+    """
+    Máscara dos pontos dentro do polígono `vertices` ([[lat, lon], ...], anel externo).
+
+    Primeiro descarta os pontos fora do retângulo envolvente; nos restantes aplica o
+    teste do raio (ray casting) vetorizado, com um laço curto sobre as arestas.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    vertices = np.asarray(vertices, dtype=np.float64)
+    dentro = np.zeros(latitudes.shape, dtype=bool)
+    if len(vertices) < 3:
+        return dentro
+
+    lat_v, lon_v = vertices[:, 0], vertices[:, 1]
+    candidatos = np.flatnonzero(
+        (latitudes >= lat_v.min()) & (latitudes <= lat_v.max())
+        & (longitudes >= lon_v.min()) & (longitudes <= lon_v.max())
+    )
+    y, x = latitudes[candidatos], longitudes[candidatos]
+    resultado = np.zeros(len(candidatos), dtype=bool)
+    for y1, x1, y2, x2 in zip(lat_v, lon_v, np.roll(lat_v, -1), np.roll(lon_v, -1)):
+        if y1 == y2:
+            continue
+        cruza = ((y1 > y) != (y2 > y)) & (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1)
+        resultado ^= cruza
+    dentro[candidatos] = resultado
+    return dentro
+
+def chave_poligono(vertices):
+    """Hash dos vértices (arredondados a ~1 m), usado como chave de cache do recorte"""
+    vertices = np.round(np.asarray(vertices, dtype=np.float64), 5).tolist()
+    return hashlib.sha256(repr(vertices).encode()).hexdigest()[:16]
+
+@em_cache_por_versao()
+def _posicoes_no_poligono(df, vertices):
+    return np.flatnonzero(pontos_no_poligono(df["latitude"], df["longitude"], vertices))
+
+def filtrar_poligono(df, vertices):
+    """
+    Recorte dos sinistros dentro do polígono. A seleção fica em cache por versão dos
+    dados e polígono, e a versão do recorte identifica a área nos caches seguintes.
+    """
+    # Vértices arredondados (~1 m): redesenhos equivalentes usam a mesma entrada do cache
+    vertices = np.round(np.asarray(vertices, dtype=np.float64), 5).tolist()
+    df_area = df.iloc[_posicoes_no_poligono(df, vertices)]
+    return versionar_recorte(df_area, df, f"poligono={chave_poligono(vertices)}")
@@ -0,0 +1,132 @@
+import hashlib
+import io
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import matplotlib.pyplot as plt
+from matplotlib._pylab_helpers import Gcf
+from matplotlib.figure import Figure
+import streamlit as st
+
+# Limite de memória para as figuras já renderizadas (compartilhado entre sessões)
+LIMITE_CACHE_FIGURAS = 64 * 1024 * 1024
+
+# Mesmos parâmetros que o st.pyplot usa ao salvar a figura
+PARAMETROS_SAVEFIG = {"format": "png", "bbox_inches": "tight", "dpi": 200}
+
+class CacheFiguras:
+    """Cache LRU de figuras renderizadas em PNG, limitado pelo total de bytes"""
+
+    def __init__(self, limite_bytes=LIMITE_CACHE_FIGURAS):
+        self.limite_bytes = limite_bytes
+        self.total_bytes = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def obter(self, chave):
+        with self._lock:
+            imagem = self._itens.get(chave)
+            if imagem is not None:
+                self._itens.move_to_end(chave)
+            return imagem
+
+    def guardar(self, chave, imagem):
+        with self._lock:
+            if chave in self._itens:
+                self.total_bytes -= len(self._itens.pop(chave))
+            self._itens[chave] = imagem
+            self.total_bytes += len(imagem)
+            # Descartar as figuras usadas há mais tempo até caber no limite
+            while self.total_bytes > self.limite_bytes and len(self._itens) > 1:
+                _, antiga = self._itens.popitem(last=False)
+                self.total_bytes -= len(antiga)
+
+cache_figuras = CacheFiguras()
+
+# Figuras criadas por criar_figura que ainda não foram coletadas
+_figuras_ativas = weakref.WeakSet()
+
+def criar_figura(figsize=None, **kwargs):
+    """
+    Cria (fig, ax) fora do estado global do pyplot: a figura não fica registrada no
+    pyplot, não é compartilhada entre as threads das sessões e some com a última referência.
+    """
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots(**kwargs)
+    _figuras_ativas.add(fig)
+    return fig, ax
+
+def liberar_figura(fig):
+    """Libera os artistas e o canvas da figura"""
+    _figuras_ativas.discard(fig)
+    fig.clear()
+    plt.close(fig)
+
+@contextmanager
+def figura(figsize=None, use_container_width=True, **kwargs):
+    """
+    Cria a figura, exibe no Streamlit ao final do bloco e sempre a libera:
+        with figura(figsize=(5, 3)) as (fig, ax):
+            ax.bar(...)
+    """
+    fig, ax = criar_figura(figsize, **kwargs)
+    try:
+        yield fig, ax
+        st.pyplot(fig, use_container_width=use_container_width)
+    finally:
+        liberar_figura(fig)
+
+def metricas_figuras():
+    """Figuras vivas (gerenciadas e do pyplot) com memória estimada, e uso do cache"""
+    vivas = list(_figuras_ativas) + [gerenciador.canvas.figure for gerenciador in Gcf.get_all_fig_managers()]
+    # Estimativa pelo buffer RGBA que o Agg aloca para renderizar cada figura
+    bytes_vivas = sum(
+        int(fig.get_figwidth() * fig.dpi) * int(fig.get_figheight() * fig.dpi) * 4
+        for fig in vivas
+    )
+    return {
+        "figuras_ativas": len(vivas),
+        "bytes_figuras_ativas": bytes_vivas,
+        "figuras_em_cache": len(cache_figuras),
+        "bytes_cache": cache_figuras.total_bytes
+    }
+
+def chave_figura(versao, funcao, *args, **kwargs):
+    """Chave de conteúdo: versão dos dados + função do gráfico + parâmetros"""
+    assinatura = repr((versao, funcao.__module__, funcao.__qualname__, args, sorted(kwargs.items())))
+    return hashlib.sha256(assinatura.encode()).hexdigest()
+
+def renderizar_png(funcao, *args, **kwargs):
+    """Monta a figura com `funcao`, renderiza em bytes PNG e libera a figura"""
+    fig = funcao(*args, **kwargs)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, **PARAMETROS_SAVEFIG)
+        return buffer.getvalue()
+    finally:
+        liberar_figura(fig)
+
+def grafico_em_cache(funcao, cubo, *args, **kwargs):
+    """
+    PNG do gráfico criar_grafico_*(cubo, ...). A figura é montada e renderizada só
+    na primeira vez para cada versão dos dados e parâmetros; depois vem do cache.
+    """
+    if cubo.versao is None:
+        # Sem versão não há como identificar os dados: renderizar sem cache
+        return renderizar_png(funcao, cubo, *args, **kwargs)
+
+    chave = chave_figura(cubo.versao, funcao, *args, **kwargs)
+    imagem = cache_figuras.obter(chave)
+    if imagem is None:
+        imagem = renderizar_png(funcao, cubo, *args, **kwargs)
+        cache_figuras.guardar(chave, imagem)
+    return imagem
+
+def exibir_grafico(funcao, cubo, *args, **kwargs):
+    """Exibe no Streamlit o gráfico criar_grafico_*(cubo, ...) usando o cache de figuras"""
+    st.image(grafico_em_cache(funcao, cubo, *args, **kwargs), use_container_width=True)
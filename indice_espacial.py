@@ -0,0 +1,121 @@
+import numpy as np
+
+from cache_versao import em_cache_por_versao
+
+# Raio médio da Terra, em metros
+RAIO_TERRA = 6_371_008.8
+
+# Lado das células do índice, em graus (~280 m de latitude)
+TAMANHO_CELULA_INDICE = 0.0025
+
+def distancia_haversine(lat1, lon1, lat2, lon2):
+    """Distância em metros entre coordenadas em graus (aceita arrays)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+class IndiceEspacial:
+    """
+    Índice em grade uniforme sobre as coordenadas dos sinistros.
+
+    Os pontos são ordenados pela chave da célula (linha × largura + coluna), então
+    cada linha da grade ocupa um trecho contíguo: uma consulta faz uma busca binária
+    por linha coberta e só calcula distâncias para os candidatos desses trechos.
+    As consultas retornam posições das linhas no DataFrame usado na construção
+    (para df.iloc), ordenadas pela distância quando houver um ponto de referência.
+    """
+
+    def __init__(self, latitudes, longitudes, tamanho_celula=TAMANHO_CELULA_INDICE):
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        posicoes = np.flatnonzero(np.isfinite(latitudes) & np.isfinite(longitudes))
+        latitudes, longitudes = latitudes[posicoes], longitudes[posicoes]
+
+        self.tamanho_celula = tamanho_celula
+        self.origem = (latitudes.min(), longitudes.min()) if posicoes.size else (0.0, 0.0)
+        linhas, colunas = self._celula(latitudes, longitudes)
+        self.largura = int(colunas.max()) + 1 if posicoes.size else 1
+        self.total_linhas = int(linhas.max()) + 1 if posicoes.size else 0
+
+        chaves = linhas * self.largura + colunas
+        ordem = np.argsort(chaves, kind="stable")
+        self.chaves = chaves[ordem]
+        self.latitudes = latitudes[ordem]
+        self.longitudes = longitudes[ordem]
+        self.posicoes = posicoes[ordem]
+
+    def __len__(self):
+        return len(self.posicoes)
+
+    def _celula(self, latitudes, longitudes):
+        linhas = np.floor((latitudes - self.origem[0]) / self.tamanho_celula).astype(np.int64)
+        colunas = np.floor((longitudes - self.origem[1]) / self.tamanho_celula).astype(np.int64)
+        return linhas, colunas
+
+    def _candidatos(self, sul, oeste, norte, leste):
+        """Índices (na ordem interna) dos pontos nas células que cobrem o retângulo"""
+        linhas_q, colunas_q = self._celula(np.array([sul, norte]), np.array([oeste, leste]))
+        if (not len(self) or linhas_q[1] < 0 or colunas_q[1] < 0
+                or linhas_q[0] >= self.total_linhas or colunas_q[0] >= self.largura):
+            return np.empty(0, dtype=np.int64)
+        linha_min, linha_max = np.clip(linhas_q, 0, self.total_linhas - 1)
+        coluna_min, coluna_max = np.clip(colunas_q, 0, self.largura - 1)
+
+        linhas = np.arange(linha_min, linha_max + 1)
+        inicios = np.searchsorted(self.chaves, linhas * self.largura + coluna_min, side="left")
+        fins = np.searchsorted(self.chaves, linhas * self.largura + coluna_max, side="right")
+        if not (fins > inicios).any():
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(inicio, fim) for inicio, fim in zip(inicios, fins) if fim > inicio])
+
+    def retangulo(self, sul, oeste, norte, leste):
+        """Posições dos sinistros dentro do retângulo (graus)"""
+        candidatos = self._candidatos(sul, oeste, norte, leste)
+        dentro = (
+            (self.latitudes[candidatos] >= sul) & (self.latitudes[candidatos] <= norte)
+            & (self.longitudes[candidatos] >= oeste) & (self.longitudes[candidatos] <= leste)
+        )
+        return np.sort(self.posicoes[candidatos[dentro]])
+
+    def _raio(self, latitude, longitude, metros):
+        delta_lat = np.degrees(metros / RAIO_TERRA)
+        # Longitude coberta pelo raio na latitude mais afastada do equador do círculo
+        cosseno = np.cos(np.radians(min(abs(latitude) + delta_lat, 89.9)))
+        delta_lon = delta_lat / cosseno
+        candidatos = self._candidatos(
+            latitude - delta_lat, longitude - delta_lon, latitude + delta_lat, longitude + delta_lon
+        )
+        distancias = distancia_haversine(
+            latitude, longitude, self.latitudes[candidatos], self.longitudes[candidatos]
+        )
+        dentro = distancias <= metros
+        candidatos, distancias = candidatos[dentro], distancias[dentro]
+        ordem = np.argsort(distancias, kind="stable")
+        return self.posicoes[candidatos[ordem]], distancias[ordem]
+
+    def raio(self, latitude, longitude, metros, distancias=False):
+        """Posições dos sinistros a até `metros` do ponto, da mais próxima à mais distante"""
+        posicoes, dist = self._raio(latitude, longitude, metros)
+        return (posicoes, dist) if distancias else posicoes
+
+    def contar_raio(self, latitude, longitude, metros):
+        """Quantidade de sinistros a até `metros` do ponto"""
+        return len(self._raio(latitude, longitude, metros)[0])
+
+    def vizinhos(self, latitude, longitude, k=5, distancias=False):
+        """
+        Os k sinistros mais próximos do ponto. O raio de busca dobra até conter k
+        pontos; como todos os pontos dentro do raio são avaliados, o resultado é exato.
+        """
+        k = min(k, len(self))
+        metros = self.tamanho_celula * np.radians(1) * RAIO_TERRA
+        while True:
+            posicoes, dist = self._raio(latitude, longitude, metros)
+            if len(posicoes) >= k:
+                return (posicoes[:k], dist[:k]) if distancias else posicoes[:k]
+            metros *= 2
+
+@em_cache_por_versao(recurso=True)
+def indice_espacial(df):
+    """Índice das coordenadas do recorte, construído uma vez e compartilhado entre sessões"""
+    return IndiceEspacial(df["latitude"], df["longitude"])
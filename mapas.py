@@ -0,0 +1,373 @@
+import base64
+import hashlib
+import io
+import os
+import shutil
+import threading
+
+import folium
+import numpy as np
+import streamlit as st
+import streamlit.components.v1 as components
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from folium.plugins import HeatMap
+from folium.template import Template
+from matplotlib.colors import to_rgb
+from matplotlib.image import imsave
+
+from config import (
+    MAP_ZOOM, MOTOCYCLIST_HEATMAP_CONFIG, GENERAL_HEATMAP_CONFIG, HEATMAP_MODO, LIMITE_PONTOS_HEATMAP,
+    LIMITE_ROTULOS_NIVEL
+)
+from cache_versao import MAXIMO_VERSOES, limitar_arquivos, versao_dos_dados
+from data import DIRETORIO_CACHE
+from espacial import (
+    rasterizar_densidade, celulas_sinistros, centro_celulas, piramide_celulas, piramide_sinistros,
+    quadros_sinistros,
+    ZOOM_MIN_PIRAMIDE, ZOOM_MAX_PIRAMIDE
+)
+from pontos_criticos import pontos_criticos
+
+# HTML dos mapas já gerados, um subdiretório por versão dos dados
+DIRETORIO_MAPAS = DIRETORIO_CACHE / "mapas"
+# Mapas mantidos em disco por versão dos dados (cada polígono, quadro e tamanho é um arquivo)
+MAXIMO_MAPAS_DISCO = 256
+
+# Versão do código que monta os mapas; incrementar ao mudar a aparência deles
+VERSAO_MAPAS = 3
+
+# Pontos críticos desenhados no mapa (os demais continuam na tabela)
+LIMITE_PONTOS_CRITICOS_MAPA = 50
+
+# Estilos do mapa de calor: recorte de veículo, opções do HeatMap e cor dos rótulos
+ESTILOS_CALOR = {
+    "moto": {"veiculo": "Motocicleta envolvida", "config": MOTOCYCLIST_HEATMAP_CONFIG, "cor": "red"},
+    "geral": {"veiculo": None, "config": GENERAL_HEATMAP_CONFIG, "cor": "black"},
+}
+
+def arrays_celulas(celulas):
+    """Colunas das células como listas para o JS (6 casas decimais, ~0,1 m)"""
+    return [
+        np.round(celulas["latitude"].to_numpy(dtype=np.float64), 6).tolist(),
+        np.round(celulas["longitude"].to_numpy(dtype=np.float64), 6).tolist(),
+        celulas["count"].to_numpy(dtype=np.int64).tolist()
+    ]
+
+class CamadaPiramide(JSCSSMixin, MacroElement):
+    """
+    Rótulos de contagem (e, opcionalmente, o mapa de calor) a partir de uma pirâmide
+    de células por nível de zoom (espacial.piramide_celulas).
+
+    A cada zoom/movimento o navegador escolhe o nível do zoom atual e desenha só as
+    células dentro da área visível: os rótulos não se sobrepõem ao afastar e o custo
+    acompanha o que está na tela, não o tamanho do dataset. Com `calor`, um
+    L.heatLayer com essas opções recebe as células de um nível dois zooms mais fino.
+    Com `limite_celulas`, os níveis a partir do primeiro com mais células que o limite
+    ficam de fora e o HTML não cresce com o dataset.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function() {
+            var mapa = {{ this._parent.get_name() }};
+            var niveis = {{ this.niveis|tojson }};
+            var zoomMin = {{ this.zoom_min }}, zoomMax = {{ this.zoom_max }};
+            var rotulos = L.layerGroup().addTo(mapa);
+            {% if this.calor %}
+            var calor = L.heatLayer([], {{ this.calor|tojavascript }}).addTo(mapa);
+            {% endif %}
+
+            function visiveis(zoom, area) {
+                var nivel = niveis[Math.min(zoomMax, Math.max(zoomMin, zoom))];
+                var latitudes = nivel[0], longitudes = nivel[1], contagens = nivel[2];
+                var indices = [];
+                for (var i = 0; i < contagens.length; i++) {
+                    if (area.contains([latitudes[i], longitudes[i]])) {
+                        indices.push(i);
+                    }
+                }
+                return {nivel: nivel, indices: indices};
+            }
+
+            function atualizar() {
+                var zoom = mapa.getZoom();
+                var area = mapa.getBounds().pad(0.25);
+                var celulas = visiveis(zoom, area);
+                rotulos.clearLayers();
+                celulas.indices.forEach(function(i) {
+                    L.marker([celulas.nivel[0][i], celulas.nivel[1][i]], {
+                        icon: L.divIcon({
+                            className: "empty",
+                            html: '<b style="font-size: 10pt; color: {{ this.cor }};">' + celulas.nivel[2][i] + '</b>'
+                        })
+                    }).addTo(rotulos);
+                });
+                {% if this.calor %}
+                var finas = visiveis(zoom + 2, area);
+                calor.setLatLngs(finas.indices.map(function(i) {
+                    return [finas.nivel[0][i], finas.nivel[1][i], finas.nivel[2][i]];
+                }));
+                {% endif %}
+            }
+
+            mapa.on("zoomend moveend", atualizar);
+            atualizar();
+            return rotulos;
+        })();
+        {% endmacro %}
+    """)
+
+    default_js = HeatMap.default_js
+
+    def __init__(self, piramide, cor="black", calor=None, limite_celulas=None):
+        super().__init__()
+        self._name = "CamadaPiramide"
+        self.cor = cor
+        if limite_celulas is not None:
+            # Do nível mais afastado ao mais aproximado; o mais afastado sempre vai
+            zooms = sorted(piramide)
+            enviados = next((i for i, zoom in enumerate(zooms) if len(piramide[zoom]) > limite_celulas), len(zooms))
+            piramide = {zoom: piramide[zoom] for zoom in zooms[:max(enviados, 1)]}
+        self.zoom_min = min(piramide, default=ZOOM_MIN_PIRAMIDE)
+        self.zoom_max = max(piramide, default=ZOOM_MAX_PIRAMIDE)
+        self.niveis = {zoom: arrays_celulas(celulas) for zoom, celulas in piramide.items()}
+        # Mesmos padrões do folium HeatMap para as opções não informadas
+        self.calor = None if calor is None else {"min_opacity": 0.5, "max_zoom": 18, **calor}
+
+class CamadaPontosCriticos(MacroElement):
+    """
+    Pontos críticos (pontos_criticos.detectar_pontos_criticos) como círculos com
+    área proporcional à quantidade de sinistros e o ranking na dica de cada um.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function() {
+            var latitudes = {{ this.latitudes|tojson }};
+            var longitudes = {{ this.longitudes|tojson }};
+            var sinistros = {{ this.sinistros|tojson }};
+            var descricoes = {{ this.descricoes|tojson }};
+            var maximo = Math.max.apply(null, sinistros.concat([1]));
+            var camada = L.featureGroup();
+            for (var i = 0; i < sinistros.length; i++) {
+                L.circleMarker([latitudes[i], longitudes[i]], {
+                    radius: 6 + 24 * Math.sqrt(sinistros[i] / maximo),
+                    color: "{{ this.cor }}",
+                    weight: 2,
+                    fillOpacity: 0.3
+                }).bindTooltip(descricoes[i]).addTo(camada);
+            }
+            return camada;
+        })().addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, pontos, cor="#d32f2f"):
+        super().__init__()
+        self._name = "CamadaPontosCriticos"
+        self.cor = cor
+        self.latitudes, self.longitudes, _ = arrays_celulas(
+            pontos.rename(columns={"Sinistros": "count"})
+        )
+        self.sinistros = pontos["Sinistros"].to_numpy(dtype=np.int64).tolist()
+        self.descricoes = [
+            f"#{ranking}: {linha['Sinistros']} sinistros, pico às {linha['Hora predominante']}h "
+            f"({linha['Logradouro predominante']})"
+            for ranking, linha in pontos.iterrows()
+        ]
+
+# Gradiente padrão do Leaflet.heat (usado pelo folium HeatMap)
+GRADIENTE_CALOR = {0.4: "blue", 0.65: "lime", 1.0: "red"}
+
+def usar_raster(celulas):
+    """Define se o mapa de calor é rasterizado no servidor (ver HEATMAP_MODO)"""
+    if HEATMAP_MODO == "auto":
+        return len(celulas) > LIMITE_PONTOS_HEATMAP
+    return HEATMAP_MODO == "raster"
+
+def colorir_densidade(densidade, gradiente=GRADIENTE_CALOR):
+    """Aplica o gradiente do mapa de calor à densidade e codifica a imagem em PNG"""
+    # Escala logarítmica: um sinistro isolado continua visível sem apagar os
+    # pontos críticos, que concentram centenas de sinistros na mesma célula
+    maximo = densidade.max()
+    intensidade = np.log1p(densidade) / np.log1p(maximo) if maximo > 0 else densidade
+    paradas = sorted(gradiente)
+    cores = np.array([to_rgb(gradiente[parada]) for parada in paradas])
+
+    rgba = np.empty(intensidade.shape + (4,))
+    for canal in range(3):
+        rgba[..., canal] = np.interp(intensidade, paradas, cores[:, canal])
+    rgba[..., 3] = np.sqrt(intensidade)
+
+    buffer = io.BytesIO()
+    imsave(buffer, rgba, format="png")
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=MAXIMO_VERSOES)
+def _raster_em_cache(versao, chave_celulas, radius, blur, zoom, _celulas):
+    return _rasterizar(_celulas, radius, blur, zoom)
+
+def _rasterizar(celulas, radius, blur, zoom):
+    densidade, limites = rasterizar_densidade(
+        celulas["latitude"], celulas["longitude"], celulas["count"], radius, blur, zoom
+    )
+    return colorir_densidade(densidade), limites
+
+def camada_calor_raster(celulas, versao, chave_celulas, radius, blur, zoom=MAP_ZOOM, **kwargs):
+    """
+    Mapa de calor como uma única imagem PNG (ImageOverlay) calculada no servidor.
+    A transferência e a memória do navegador não crescem com o número de pontos.
+    O kernel segue radius/blur no nível `zoom`; em outros zooms a imagem é escalada.
+    `chave_celulas` identifica o recorte das células (ex.: o filtro de veículo).
+    Demais opções do HeatMap (min_opacity, max_zoom) não se aplicam à imagem.
+    """
+    if versao is None:
+        png, limites = _rasterizar(celulas, radius, blur, zoom)
+    else:
+        png, limites = _raster_em_cache(versao, chave_celulas, radius, blur, zoom, celulas)
+    return folium.raster_layers.ImageOverlay(
+        "data:image/png;base64," + base64.b64encode(png).decode(),
+        bounds=limites,
+        pixelated=False
+    )
+
+def caminho_mapa(versao, tipo, **filtro):
+    """Arquivo do mapa para (versão dos dados, tipo de mapa, filtro)"""
+    # A versão base (antes dos recortes) define o subdiretório invalidado em bloco
+    versao_dados = versao.split("|")[0]
+    chave = hashlib.sha256(repr((VERSAO_MAPAS, versao, tipo, sorted(filtro.items()))).encode()).hexdigest()[:16]
+    return DIRETORIO_MAPAS / versao_dados / f"{tipo}-{chave}.html"
+
+def renderizar_mapa(mapa):
+    """HTML completo do mapa, como o folium_static gera"""
+    return folium.Figure().add_child(mapa).render()
+
+def html_mapa(versao, tipo, construir, **filtro):
+    """
+    HTML do mapa montado por construir(). É gerado uma vez por versão dos dados,
+    tipo de mapa e filtro e salvo em disco; as sessões seguintes só leem o arquivo.
+    Ficam em disco os MAXIMO_MAPAS_DISCO mapas usados mais recentemente.
+    """
+    if versao is None:
+        return renderizar_mapa(construir())
+
+    caminho = caminho_mapa(versao, tipo, **filtro)
+    try:
+        html = caminho.read_text(encoding="utf-8")
+        # Marca o uso para a poda por mtime
+        os.utime(caminho)
+        return html
+    except FileNotFoundError:
+        # Ainda não gerado, ou removido por outro processo entre as chamadas
+        pass
+
+    html = renderizar_mapa(construir())
+    temporario = caminho.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario.write_text(html, encoding="utf-8")
+        os.replace(temporario, caminho)
+    except OSError:
+        # Diretório removido por outro processo durante a escrita: o mapa só não fica salvo
+        temporario.unlink(missing_ok=True)
+        return html
+
+    # Mapas de versões anteriores dos dados não serão mais usados
+    for antigo in DIRETORIO_MAPAS.iterdir():
+        if antigo != caminho.parent:
+            shutil.rmtree(antigo, ignore_errors=True)
+    limitar_arquivos(caminho.parent, "*.html", MAXIMO_MAPAS_DISCO)
+    return html
+
+def exibir_mapa(html, width=700, height=500):
+    """Exibe o HTML do mapa no Streamlit (mesmo componente usado pelo folium_static)"""
+    components.html(html, height=height + 10, width=width)
+
+def _montar_mapa_calor(celulas, piramide, centro, config, cor, versao, chave_celulas, width, height):
+    mapa = folium.Map(
+        location=centro,
+        zoom_start=MAP_ZOOM,
+        width=width,
+        height=height
+    )
+
+    # Rótulos (e o calor, se não rasterizado) vêm do nível da pirâmide do zoom atual
+    if len(celulas) and usar_raster(celulas):
+        # Muitas células: densidade calculada no servidor e enviada como imagem
+        camada_calor_raster(celulas, versao, chave_celulas, **config).add_to(mapa)
+        CamadaPiramide(piramide, cor=cor, limite_celulas=LIMITE_ROTULOS_NIVEL).add_to(mapa)
+    else:
+        CamadaPiramide(piramide, cor=cor, calor=config).add_to(mapa)
+    return mapa
+
+def construir_mapa_calor(df, estilo="geral", width=650, height=500):
+    """
+    Mapa de calor dos sinistros no `estilo` de ESTILOS_CALOR: células ponderadas do
+    recorte, calor no navegador ou rasterizado (ver HEATMAP_MODO) e rótulos de contagem
+    por nível de zoom.
+    """
+    veiculo, config, cor = (ESTILOS_CALOR[estilo][chave] for chave in ("veiculo", "config", "cor"))
+    celulas = celulas_sinistros(df, veiculo=veiculo)
+    return _montar_mapa_calor(
+        celulas, piramide_sinistros(df, veiculo=veiculo), centro_celulas(celulas), config, cor,
+        versao_dos_dados(df), veiculo, width, height
+    )
+
+def avisar_mapa_vazio(df, estilo="geral"):
+    """Avisa quando o recorte não tem sinistros (do veículo do estilo) para o mapa"""
+    if celulas_sinistros(df, veiculo=ESTILOS_CALOR[estilo]["veiculo"]).empty:
+        st.info("Nenhum sinistro com coordenadas no recorte selecionado; o mapa está vazio.")
+
+def exibir_mapa_calor(df, estilo="geral", width=650, height=500):
+    """
+    Exibe o mapa de calor do recorte. O HTML é montado uma vez por (versão dos dados,
+    estilo, tamanho) e compartilhado por todas as telas que mostram o mesmo mapa.
+    """
+    avisar_mapa_vazio(df, estilo)
+    html = html_mapa(
+        versao_dos_dados(df), "calor", lambda: construir_mapa_calor(df, estilo, width, height),
+        estilo=estilo, config=ESTILOS_CALOR[estilo]["config"], modo=HEATMAP_MODO,
+        width=width, height=height
+    )
+    exibir_mapa(html, width=width, height=height)
+
+def construir_mapa_quadro(df, por, quadro, estilo="geral", width=650, height=500):
+    """
+    Mapa de calor de um quadro da animação (posição em quadros_sinistros). O centro
+    é o do período inteiro, para o mapa não se deslocar entre os quadros.
+    """
+    veiculo, config, cor = (ESTILOS_CALOR[estilo][chave] for chave in ("veiculo", "config", "cor"))
+    _, quadros = quadros_sinistros(df, por, veiculo=veiculo)
+    celulas = quadros[quadros["quadro"] == quadro].drop(columns="quadro")
+    piramide = piramide_celulas(celulas["latitude"], celulas["longitude"], pesos=celulas["count"])
+    return _montar_mapa_calor(
+        celulas, piramide, centro_celulas(celulas_sinistros(df, veiculo=veiculo)), config, cor,
+        versao_dos_dados(df), (veiculo, por, quadro), width, height
+    )
+
+def exibir_mapa_quadro(df, por, quadro, estilo="geral", width=650, height=500):
+    """Exibe um quadro da animação; cada quadro é montado só quando é pedido pela primeira vez"""
+    html = html_mapa(
+        versao_dos_dados(df), "quadro", lambda: construir_mapa_quadro(df, por, quadro, estilo, width, height),
+        por=por, quadro=quadro, estilo=estilo, config=ESTILOS_CALOR[estilo]["config"], modo=HEATMAP_MODO,
+        width=width, height=height
+    )
+    exibir_mapa(html, width=width, height=height)
+
+def construir_mapa_pontos_criticos(df, limite=LIMITE_PONTOS_CRITICOS_MAPA, width=700, height=500):
+    """Mapa de calor geral com os `limite` pontos críticos mais graves por cima"""
+    pontos = pontos_criticos(df).head(limite)
+    mapa = construir_mapa_calor(df, "geral", width, height)
+    if len(pontos):
+        CamadaPontosCriticos(pontos).add_to(mapa)
+    return mapa
+
+def exibir_mapa_pontos_criticos(df, limite=LIMITE_PONTOS_CRITICOS_MAPA, width=700, height=500):
+    """Exibe o mapa dos pontos críticos (HTML salvo em disco por recorte)"""
+    avisar_mapa_vazio(df)
+    html = html_mapa(
+        versao_dos_dados(df), "pontos_criticos", lambda: construir_mapa_pontos_criticos(df, limite, width, height),
+        limite=limite, config=GENERAL_HEATMAP_CONFIG, modo=HEATMAP_MODO, width=width, height=height
+    )
+    exibir_mapa(html, width=width, height=height)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from cache_versao import em_cache_por_versao
+
+# Segmentação binária: penalidade por mudança (× log do nº de meses), tamanho
+# mínimo de cada regime (meses) e número máximo de mudanças por série
+PENALIDADE_MUDANCA = 3.0
+MINIMO_MESES_REGIME = 3
+MAXIMO_MUDANCAS = 4
+
+# Nome da série com o total de todos os logradouros
+SERIE_GERAL = "Geral"
+
+def matriz_mensal(cubo):
+    """
+    Sinistros por mês (do primeiro ao último mês com registro no cubo) do total e
+    de cada logradouro: DataFrame meses × (SERIE_GERAL + logradouros).
+    """
+    matriz = cubo.por_mes("logradouro").rename_axis(columns=None)
+    matriz.insert(0, SERIE_GERAL, matriz.sum(axis=1).astype(np.int64))
+    return matriz
+
+def _custo(soma, tamanho):
+    """Deviance de Poisson do regime (sem os termos que não dependem da segmentação)"""
+    media = soma / np.maximum(tamanho, 1)
+    return -2 * soma * np.log(np.where(soma > 0, media, 1))
+
+def segmentar(matriz, penalidade=PENALIDADE_MUDANCA, minimo=MINIMO_MESES_REGIME, maximo=MAXIMO_MUDANCAS):
+    """
+    Segmentação binária de todas as séries (linhas de `matriz`) ao mesmo tempo.
+
+    O custo de um regime sai das somas acumuladas em O(1); a cada rodada, o ganho de
+    dividir o regime que contém cada mês é calculado para todas as séries e meses de
+    uma vez (matriz séries × meses) e cada série aceita a melhor divisão se o ganho
+    superar a penalidade. Retorna a máscara séries × meses dos inícios de regime.
+    """
+    matriz = np.asarray(matriz, dtype=np.float64)
+    series, meses = matriz.shape
+    acumulado = np.zeros((series, meses + 1))
+    np.cumsum(matriz, axis=1, out=acumulado[:, 1:])
+    limiar = penalidade * np.log(max(meses, 2))
+
+    posicoes = np.arange(meses + 1)
+    fronteiras = np.zeros((series, meses + 1), dtype=bool)
+    fronteiras[:, [0, meses]] = True
+    linhas = np.arange(series)[:, None]
+    for _ in range(maximo):
+        # Regime [inicio, fim) que contém cada candidato t
+        inicio = np.maximum.accumulate(np.where(fronteiras, posicoes, 0), axis=1)
+        fim = np.minimum.accumulate(np.where(fronteiras, posicoes, meses)[:, ::-1], axis=1)[:, ::-1]
+        soma_inicio, soma_fim = acumulado[linhas, inicio], acumulado[linhas, fim]
+
+        ganho = (
+            _custo(soma_fim - soma_inicio, fim - inicio)
+            - _custo(acumulado - soma_inicio, posicoes - inicio)
+            - _custo(soma_fim - acumulado, fim - posicoes)
+        )
+        validos = ~fronteiras & (posicoes - inicio >= minimo) & (fim - posicoes >= minimo)
+        ganho = np.where(validos, ganho, -np.inf)
+
+        melhor = ganho.argmax(axis=1)
+        aceitas = ganho[np.arange(series), melhor] > limiar
+        if not aceitas.any():
+            break
+        fronteiras[np.flatnonzero(aceitas), melhor[aceitas]] = True
+    return fronteiras[:, :meses]
+
+def medias_regimes(matriz, inicios):
+    """Média de cada mês no regime a que pertence (mesmo shape de `matriz`)"""
+    matriz = np.asarray(matriz, dtype=np.float64)
+    # Numeração global dos regimes: séries diferentes nunca compartilham um número
+    regimes = np.cumsum(inicios.ravel()) - 1
+    soma = np.bincount(regimes, weights=matriz.ravel())
+    tamanho = np.bincount(regimes)
+    return (soma / tamanho)[regimes].reshape(matriz.shape)
+
+@em_cache_por_versao()
+def mudancas_regime(cubo):
+    """
+    (sinistros mensais, média do regime de cada mês, tabela de mudanças) do total
+    e de cada logradouro, segmentados em uma única passada e guardados por recorte.
+    """
+    mensal = matriz_mensal(cubo)
+    series = mensal.to_numpy().T
+    inicios = segmentar(series)
+    medias = medias_regimes(series, inicios)
+
+    # Mudanças: inícios de regime fora do primeiro mês
+    serie, mes = np.nonzero(inicios[:, 1:])
+    mes += 1
+    antes, depois = medias[serie, mes - 1], medias[serie, mes]
+    mudancas = pd.DataFrame({
+        "Logradouro": mensal.columns[serie],
+        "Mês": mensal.index[mes].astype(str),
+        "Média antes": antes,
+        "Média depois": depois,
+        "Variação (%)": np.where(antes > 0, (depois - antes) / np.where(antes > 0, antes, 1) * 100, np.nan),
+    })
+    regimes = pd.DataFrame(medias.T, index=mensal.index, columns=mensal.columns)
+    return mensal, regimes, mudancas
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from cache_versao import em_cache_por_versao
+from data import VEICULOS
+
+# Lado das células usadas na detecção, em graus (~110 m de latitude)
+RESOLUCAO_PONTO_CRITICO = 0.001
+
+# Sinistros mínimos para uma célula ser densa (e entrar em um ponto crítico)
+MINIMO_SINISTROS_CELULA = 3
+
+# Deslocamentos (linha, coluna) das 8 células vizinhas
+VIZINHOS = [(dl, dc) for dl in (-1, 0, 1) for dc in (-1, 0, 1) if (dl, dc) != (0, 0)]
+
+def componentes_celulas(linhas, colunas):
+    """
+    Rótulo do componente conectado (vizinhança de 8) de cada célula densa.
+
+    As células são localizadas por busca binária sobre as chaves ordenadas; os rótulos
+    se propagam pelo menor vizinho com salto de ponteiros até estabilizar. Custo
+    O(n log n) por iteração, sem matriz de distâncias.
+    """
+    largura = colunas.max() + 3
+    chaves = (linhas + 1) * largura + (colunas + 1)
+    ordem = np.argsort(chaves)
+    chaves_ordenadas = chaves[ordem]
+
+    # Índice de cada vizinho existente (-1 quando a célula vizinha não é densa)
+    vizinhos = []
+    for dl, dc in VIZINHOS:
+        alvo = chaves + dl * largura + dc
+        posicao = np.clip(np.searchsorted(chaves_ordenadas, alvo), 0, len(chaves) - 1)
+        vizinhos.append(np.where(chaves_ordenadas[posicao] == alvo, ordem[posicao], -1))
+    vizinhos = np.stack(vizinhos)
+
+    rotulos = np.arange(len(chaves))
+    while True:
+        candidatos = np.where(vizinhos >= 0, rotulos[np.maximum(vizinhos, 0)], rotulos)
+        novos = np.minimum(rotulos, candidatos.min(axis=0))
+        novos = novos[novos]
+        if np.array_equal(novos, rotulos):
+            return np.unique(rotulos, return_inverse=True)[1]
+        rotulos = novos
+
+def detectar_pontos_criticos(df, resolucao=RESOLUCAO_PONTO_CRITICO, minimo=MINIMO_SINISTROS_CELULA):
+    """
+    Agrupa os sinistros em pontos críticos: células densas da grade ligadas entre si.
+
+    Retorna um DataFrame ordenado pela quantidade de sinistros, com centróide,
+    quantidade, células ocupadas, hora e logradouro predominantes e a soma de
+    veículos envolvidos por tipo (VEICULOS).
+    """
+    validos = (df["latitude"].notna() & df["longitude"].notna()).to_numpy()
+    df = df[validos]
+    latitudes = df["latitude"].to_numpy(dtype=np.float64)
+    longitudes = df["longitude"].to_numpy(dtype=np.float64)
+    colunas_saida = ["latitude", "longitude", "Sinistros", "Células", "Hora predominante", "Logradouro predominante"] + VEICULOS
+    if latitudes.size == 0:
+        return pd.DataFrame(columns=colunas_saida)
+
+    linhas = np.floor(latitudes / resolucao).astype(np.int64)
+    colunas = np.floor(longitudes / resolucao).astype(np.int64)
+    linhas -= linhas.min()
+    colunas -= colunas.min()
+    chaves = linhas * (colunas.max() + 1) + colunas
+    _, primeira, celula, contagem = np.unique(chaves, return_index=True, return_inverse=True, return_counts=True)
+
+    # Células densas e o ponto crítico de cada uma
+    densas = np.flatnonzero(contagem >= minimo)
+    if densas.size == 0:
+        return pd.DataFrame(columns=colunas_saida)
+    componente = np.full(len(contagem), -1)
+    componente[densas] = componentes_celulas(linhas[primeira[densas]], colunas[primeira[densas]])
+
+    ponto = componente[celula]
+    dentro = ponto >= 0
+    ponto = ponto[dentro]
+    total_pontos = ponto.max() + 1
+    sinistros = np.bincount(ponto, minlength=total_pontos)
+
+    horas = df["Hora do Sinistro"].to_numpy(dtype=np.float64)[dentro]
+    com_hora = ~np.isnan(horas)
+    por_hora = np.bincount(
+        ponto[com_hora] * 24 + horas[com_hora].astype(np.int64), minlength=total_pontos * 24
+    ).reshape(total_pontos, 24)
+
+    # Logradouro ausente (código -1) vai para a última posição, rotulada None
+    logradouros = df["Logradouro"].astype("category").cat
+    nomes = np.append(np.asarray(logradouros.categories, dtype=object), None)
+    codigos = np.where(logradouros.codes.to_numpy() >= 0, logradouros.codes.to_numpy(), len(nomes) - 1)[dentro]
+    por_logradouro = np.bincount(
+        ponto * len(nomes) + codigos, minlength=total_pontos * len(nomes)
+    ).reshape(total_pontos, len(nomes))
+
+    resultado = pd.DataFrame({
+        "latitude": np.bincount(ponto, weights=latitudes[dentro]) / sinistros,
+        "longitude": np.bincount(ponto, weights=longitudes[dentro]) / sinistros,
+        "Sinistros": sinistros,
+        "Células": np.bincount(componente[densas], minlength=total_pontos),
+        "Hora predominante": np.where(por_hora.any(axis=1), por_hora.argmax(axis=1), -1),
+        "Logradouro predominante": nomes[por_logradouro.argmax(axis=1)],
+    })
+    for veiculo in VEICULOS:
+        resultado[veiculo] = np.bincount(
+            ponto, weights=df[veiculo].to_numpy(dtype=np.float64)[dentro], minlength=total_pontos
+        ).astype(np.int64)
+
+    resultado = resultado.sort_values("Sinistros", ascending=False, kind="stable").reset_index(drop=True)
+    resultado.index = pd.RangeIndex(1, len(resultado) + 1, name="Ranking")
+    return resultado
+
+@em_cache_por_versao()
+def pontos_criticos(df, resolucao=RESOLUCAO_PONTO_CRITICO, minimo=MINIMO_SINISTROS_CELULA):
+    """Pontos críticos do recorte (em cache por versão dos dados e parâmetros)"""
+    return detectar_pontos_criticos(df, resolucao, minimo)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from cache_versao import em_cache_por_versao
+
+# Meses previstos à frente e quantil normal do intervalo de 95%
+HORIZONTE_PREVISAO = 12
+Z_INTERVALO = 1.96
+
+# Meses mínimos para decompor e prever: dois ciclos completos da sazonalidade
+MINIMO_MESES_PREVISAO = 24
+
+def serie_mensal(cubo):
+    """Sinistros por mês do calendário (Series com PeriodIndex mensal) a partir do cubo"""
+    # Meses sem registro entram com zero para manter o ciclo de 12 posições
+    return cubo.por_mes().astype(np.float64)
+
+def media_movel_centrada(valores, periodo=12):
+    """Média móvel 2×periodo centrada (pesos 0,5 nas pontas); NaN nas bordas"""
+    pesos = np.r_[0.5, np.ones(periodo - 1), 0.5] / periodo
+    tendencia = np.full(len(valores), np.nan)
+    if len(valores) > periodo:
+        meio = periodo // 2
+        tendencia[meio:len(valores) - meio] = np.convolve(valores, pesos, mode="valid")
+    return tendencia
+
+def decompor(valores, periodo=12, inicio_sazonal=0):
+    """
+    Decomposição aditiva clássica: tendência (média móvel centrada), sazonalidade
+    (média de cada posição do ciclo sobre a série sem tendência, com soma zero) e
+    resíduo. `inicio_sazonal` é a posição no ciclo do primeiro valor (ex.: mês - 1).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    tendencia = media_movel_centrada(valores, periodo)
+    posicao = (np.arange(len(valores)) + inicio_sazonal) % periodo
+
+    sem_tendencia = valores - tendencia
+    validos = ~np.isnan(sem_tendencia)
+    soma = np.bincount(posicao[validos], weights=sem_tendencia[validos], minlength=periodo)
+    quantidade = np.bincount(posicao[validos], minlength=periodo)
+    indices = np.divide(soma, quantidade, out=np.zeros(periodo), where=quantidade > 0)
+    indices -= indices.mean()
+
+    sazonal = indices[posicao]
+    return tendencia, sazonal, valores - tendencia - sazonal, indices
+
+def prever(valores, horizonte=HORIZONTE_PREVISAO, periodo=12, inicio_sazonal=0):
+    """
+    Previsão = tendência linear ajustada (mínimos quadrados) à série dessazonalizada
+    + índice sazonal do mês. O intervalo de 95% usa o erro padrão de predição da
+    regressão. Retorna (previsto, inferior, superior) com `horizonte` valores.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    _, _, _, indices = decompor(valores, periodo, inicio_sazonal)
+    t = np.arange(len(valores))
+    dessazonalizada = valores - indices[(t + inicio_sazonal) % periodo]
+    inclinacao, intercepto = np.polyfit(t, dessazonalizada, 1)
+
+    residuos = dessazonalizada - (intercepto + inclinacao * t)
+    graus = max(len(valores) - 2, 1)
+    desvio = np.sqrt((residuos ** 2).sum() / graus)
+
+    futuro = np.arange(len(valores), len(valores) + horizonte)
+    previsto = intercepto + inclinacao * futuro + indices[(futuro + inicio_sazonal) % periodo]
+    erro = desvio * np.sqrt(1 + 1 / len(t) + (futuro - t.mean()) ** 2 / ((t - t.mean()) ** 2).sum())
+    # Contagens não são negativas
+    return np.clip(previsto, 0, None), np.clip(previsto - Z_INTERVALO * erro, 0, None), previsto + Z_INTERVALO * erro
+
+@em_cache_por_versao()
+def decomposicao_e_previsao(cubo, horizonte=HORIZONTE_PREVISAO):
+    """
+    (decomposição, previsão) da série mensal do cubo. O ajuste fica em cache por
+    recorte e horizonte, compartilhado pela aba temporal e pelo chat bot. Com menos
+    de MINIMO_MESES_PREVISAO meses os componentes ficam em NaN e a previsão vazia.
+    """
+    serie = serie_mensal(cubo)
+    if len(serie) < MINIMO_MESES_PREVISAO:
+        decomposicao = pd.DataFrame(
+            {"Sinistros": serie.to_numpy(), "Tendência": np.nan, "Sazonalidade": np.nan, "Resíduo": np.nan},
+            index=serie.index
+        )
+        previsao = pd.DataFrame(
+            columns=["Previsto", "Limite inferior", "Limite superior"], dtype=np.float64,
+            index=pd.PeriodIndex([], freq="M", name="Ano/Mês")
+        )
+        return decomposicao, previsao
+    inicio_sazonal = serie.index[0].month - 1
+    tendencia, sazonal, residuo, _ = decompor(serie.to_numpy(), inicio_sazonal=inicio_sazonal)
+    decomposicao = pd.DataFrame(
+        {"Sinistros": serie.to_numpy(), "Tendência": tendencia, "Sazonalidade": sazonal, "Resíduo": residuo},
+        index=serie.index
+    )
+    previsto, inferior, superior = prever(serie.to_numpy(), horizonte, inicio_sazonal=inicio_sazonal)
+    previsao = pd.DataFrame(
+        {"Previsto": previsto, "Limite inferior": inferior, "Limite superior": superior},
+        index=pd.period_range(serie.index[-1] + 1, periods=horizonte, freq="M", name="Ano/Mês")
+    )
+    return decomposicao, previsao
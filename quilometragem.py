@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from cache_versao import em_cache_por_versao
+from data import VEICULOS
+from rodovia import LIMITE_AFASTAMENTO
+
+# Comprimentos de trecho (km) com agregação pré-calculada
+SEGMENTOS_KM = (0.5, 1.0, 2.0, 5.0)
+
+def quilometragem(df):
+    """
+    KM de cada sinistro: o projetado a partir das coordenadas quando o ponto está a
+    até LIMITE_AFASTAMENTO metros do traçado; senão, o KM informado em "Numero/KM".
+    """
+    km = df["KM"].to_numpy(dtype=np.float64) if "KM" in df.columns else np.full(len(df), np.nan)
+    if "KM projetado" in df.columns:
+        projetado = df["KM projetado"].to_numpy(dtype=np.float64)
+        proximo = df["Afastamento (m)"].to_numpy(dtype=np.float64) <= LIMITE_AFASTAMENTO
+        km = np.where(proximo, projetado, km)
+    return km
+
+class IndiceKM:
+    """
+    Quilometragem (ver quilometragem) dos sinistros em ordem crescente, com a posição de
+    cada linha no DataFrame de origem.
+
+    Consultas por intervalo de KM são duas buscas binárias; as contagens por trecho
+    dos comprimentos em SEGMENTOS_KM são calculadas na construção.
+    """
+
+    def __init__(self, df, segmentos=SEGMENTOS_KM):
+        km = quilometragem(df)
+        posicoes = np.flatnonzero(np.isfinite(km))
+        ordem = np.argsort(km[posicoes], kind="stable")
+        self.km = km[posicoes][ordem]
+        self.posicoes = posicoes[ordem]
+        self.veiculos = df[VEICULOS].to_numpy(dtype=np.int64)[self.posicoes]
+        self._segmentos = {tamanho: self._agregar(tamanho) for tamanho in segmentos}
+
+    def __len__(self):
+        return len(self.km)
+
+    def _limites(self, km_inicio, km_fim):
+        return np.searchsorted(self.km, km_inicio, side="left"), np.searchsorted(self.km, km_fim, side="right")
+
+    def intervalo(self, km_inicio, km_fim):
+        """Posições (para df.iloc) dos sinistros com km_inicio <= KM <= km_fim, em ordem de KM"""
+        inicio, fim = self._limites(km_inicio, km_fim)
+        return self.posicoes[inicio:fim]
+
+    def contar(self, km_inicio, km_fim):
+        """Quantidade de sinistros com km_inicio <= KM <= km_fim"""
+        inicio, fim = self._limites(km_inicio, km_fim)
+        return int(fim - inicio)
+
+    def _agregar(self, tamanho):
+        """Sinistros e veículos por trecho [k × tamanho, (k + 1) × tamanho)"""
+        colunas = ["KM inicial", "KM final", "Sinistros"] + VEICULOS
+        if not len(self.km):
+            return pd.DataFrame(columns=colunas)
+        trechos = np.floor(self.km / tamanho).astype(np.int64)
+        primeiro = trechos[0]
+        trechos -= primeiro
+        total = trechos[-1] + 1
+        inicio = (np.arange(total) + primeiro) * tamanho
+        resultado = pd.DataFrame({
+            "KM inicial": inicio,
+            "KM final": inicio + tamanho,
+            "Sinistros": np.bincount(trechos, minlength=total),
+        })
+        for i, veiculo in enumerate(VEICULOS):
+            resultado[veiculo] = np.bincount(trechos, weights=self.veiculos[:, i], minlength=total).astype(np.int64)
+        return resultado
+
+    def segmentos(self, tamanho=1.0, km_inicio=None, km_fim=None):
+        """
+        Trechos de `tamanho` km (inclusive os sem sinistros) que se sobrepõem ao
+        intervalo pedido; comprimentos fora de SEGMENTOS_KM são agregados na hora.
+        """
+        if tamanho not in self._segmentos:
+            self._segmentos[tamanho] = self._agregar(tamanho)
+        trechos = self._segmentos[tamanho]
+        if km_inicio is not None:
+            trechos = trechos[trechos["KM final"] > km_inicio]
+        if km_fim is not None:
+            trechos = trechos[trechos["KM inicial"] <= km_fim]
+        return trechos
+
+@em_cache_por_versao(recurso=True)
+def indice_km(df):
+    """Índice de quilometragem do recorte, construído uma vez e compartilhado entre sessões"""
+    return IndiceKM(df)
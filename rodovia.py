@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Traçado da Rodovia Raposo Tavares (GeoJSON com LineString ou MultiLineString).
+# A propriedade opcional "km_inicial" informa a quilometragem do primeiro vértice.
+ARQUIVO_RODOVIA = "raposo_tavares.geojson"
+
+# Raio médio da Terra, em metros
+RAIO_TERRA = 6_371_008.8
+
+# Afastamento máximo do traçado para o KM projetado valer para o sinistro
+LIMITE_AFASTAMENTO = 150
+
+# Limite de elementos (pontos × segmentos) de cada bloco da projeção
+LIMITE_BLOCO_PROJECAO = 4_000_000
+
+def carregar_polilinha(caminho=ARQUIVO_RODOVIA):
+    """
+    Vértices do traçado ([[lat, lon], ...], na ordem da quilometragem) e o KM do
+    primeiro vértice. Partes de um MultiLineString são encadeadas na ordem do arquivo.
+    """
+    with open(caminho, encoding="utf-8") as arquivo:
+        geojson = json.load(arquivo)
+    feicoes = geojson["features"] if geojson.get("type") == "FeatureCollection" else [geojson]
+
+    vertices, km_inicial = [], 0.0
+    for feicao in feicoes:
+        geometria = feicao.get("geometry", feicao)
+        km_inicial = float(feicao.get("properties", {}).get("km_inicial", km_inicial))
+        partes = [geometria["coordinates"]] if geometria["type"] == "LineString" else geometria["coordinates"]
+        for parte in partes:
+            vertices.extend([lat, lon] for lon, lat, *_ in parte)
+    return np.asarray(vertices, dtype=np.float64), km_inicial
+
+def _metros(latitudes, longitudes, latitude_ref):
+    """Projeção equiretangular local (metros), precisa na extensão de uma rodovia"""
+    x = np.radians(longitudes) * np.cos(np.radians(latitude_ref)) * RAIO_TERRA
+    y = np.radians(latitudes) * RAIO_TERRA
+    return x, y
+
+def projetar_na_polilinha(latitudes, longitudes, vertices, km_inicial=0.0):
+    """
+    Projeta cada ponto no segmento mais próximo do traçado.
+
+    A distância ponto-segmento é calculada de forma vetorizada para todos os
+    segmentos, em blocos de pontos para limitar a memória. Retorna (km, afastamento):
+    a quilometragem do ponto projetado e a distância até o traçado, em metros.
+    Pontos sem coordenadas ficam com NaN.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    km = np.full(latitudes.shape, np.nan)
+    afastamento = np.full(latitudes.shape, np.nan)
+
+    latitude_ref = vertices[:, 0].mean()
+    vx, vy = _metros(vertices[:, 0], vertices[:, 1], latitude_ref)
+    ax, ay = vx[:-1], vy[:-1]
+    dx, dy = np.diff(vx), np.diff(vy)
+    comprimento2 = dx ** 2 + dy ** 2
+    # Segmentos de comprimento zero (vértices repetidos) ficam com t = 0
+    divisor = np.where(comprimento2 > 0, comprimento2, 1)
+    acumulado = np.concatenate([[0.0], np.cumsum(np.sqrt(comprimento2))])[:-1]
+
+    validos = np.flatnonzero(np.isfinite(latitudes) & np.isfinite(longitudes))
+    px, py = _metros(latitudes[validos], longitudes[validos], latitude_ref)
+    bloco = max(1, LIMITE_BLOCO_PROJECAO // max(len(ax), 1))
+    for inicio in range(0, len(validos), bloco):
+        bx, by = px[inicio:inicio + bloco, None], py[inicio:inicio + bloco, None]
+        # Fração t do segmento onde cai a projeção, limitada às extremidades
+        t = np.clip(((bx - ax) * dx + (by - ay) * dy) / divisor, 0, 1)
+        distancia2 = (ax + t * dx - bx) ** 2 + (ay + t * dy - by) ** 2
+        segmento = distancia2.argmin(axis=1)
+        linhas = np.arange(len(segmento))
+        posicoes = validos[inicio:inicio + bloco]
+        km[posicoes] = km_inicial + (acumulado[segmento] + t[linhas, segmento] * np.sqrt(comprimento2[segmento])) / 1000
+        afastamento[posicoes] = np.sqrt(distancia2[linhas, segmento])
+    return km, afastamento
+
+def projetar_na_rodovia(df, caminho=ARQUIVO_RODOVIA):
+    """
+    Colunas "KM projetado" e "Afastamento (m)" a partir das coordenadas. Sem o
+    arquivo do traçado, as colunas ficam vazias (NaN) e vale o KM informado.
+    """
+    if not Path(caminho).exists():
+        df["KM projetado"] = np.nan
+        df["Afastamento (m)"] = np.nan
+        return df
+    vertices, km_inicial = carregar_polilinha(caminho)
+    df["KM projetado"], df["Afastamento (m)"] = projetar_na_polilinha(
+        df["latitude"], df["longitude"], vertices, km_inicial
+    )
+    return df
@@ -1,11 +1,16 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import pandas as pd
+from figuras import figura, criar_figura, exibir_grafico
+from pontos_criticos import pontos_criticos
+from indice_espacial import indice_espacial
+from mapas import exibir_mapa_pontos_criticos
+from mudancas import mudancas_regime, SERIE_GERAL
+from tabs.analise_temporal import criar_grafico_regimes
 
-def criar_grafico_local(df):
+def criar_grafico_local(cubo):
     """Função para criar gráfico de locais que pode ser reutilizada"""
-    logradouro_com_mais_sinistros = df["Logradouro"].value_counts().head(10)
-    fig, ax = plt.subplots(figsize=(10, 6))
+    logradouro_com_mais_sinistros = cubo.somar("logradouro").sort_values(ascending=False).head(10)
+    fig, ax = criar_figura(figsize=(10, 6))
     bars = ax.barh(logradouro_com_mais_sinistros.index, logradouro_com_mais_sinistros.values, color="#1E88E5")
     
     for bar in bars:
@@ -14,55 +19,112 @@ def criar_grafico_local(df):
     
     ax.set_xlabel("Quantidade")
     ax.set_ylabel("Logradouro")
-    plt.grid(axis="x", linestyle="--", alpha=0.7)
-    plt.tight_layout()
+    ax.grid(axis="x", linestyle="--", alpha=0.7)
+    fig.tight_layout()
     
     return fig
 
-def tab_analise_local(df_filtrado, veiculos, relacao_logradouro_veiculos_sorted):
-    # Criar uma cópia do DataFrame no início da função
-    df_analysis = df_filtrado.copy()
-    
+def tab_analise_local(df_filtrado, cubo, veiculos, relacao_logradouro_veiculos_sorted):
     col1, col2 = st.columns(2)
 
     with col1:
         # Gráfico de logradouros com mais sinistros
         st.subheader("Logradouros com Mais Sinistros (2021-2023)")
-        fig = criar_grafico_local(df_analysis)  # Usando a função criar_grafico_local
-        st.pyplot(fig)
+        exibir_grafico(criar_grafico_local, cubo)  # Figura vem do cache quando já renderizada
 
     with col2:
         # Gráfico de dias úteis vs fins de semana
         st.subheader("Dias Úteis vs Fins de Semana (2021-2023)")
-        df_analysis.loc[:, "Dia da Semana"] = df_analysis["Data do Sinistro"].dt.day_name()
-        df_analysis.loc[:, "É Fim de Semana"] = df_analysis["Dia da Semana"].isin(["Saturday", "Sunday"])
-        fim_semana_vs_uteis = df_analysis["É Fim de Semana"].value_counts().rename(
-            index={True: "Fim de Semana", False: "Dias Úteis"}
-        )
-        fig, ax = plt.subplots(figsize=(10, 6))
-        bars = ax.bar(fim_semana_vs_uteis.index, fim_semana_vs_uteis.values, color=["orange", "blue"])
-        for bar in bars:
-            yval = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), ha='center', va='bottom')
-        ax.set_xlabel("Categoria")
-        ax.set_ylabel("Quantidade")
-        plt.grid(axis="y", linestyle="--", alpha=0.7)
-        st.pyplot(fig)
+        sinistros_por_dia = cubo.somar("dia_semana", informados=True)
+        fim_semana_vs_uteis = pd.Series({
+            "Dias Úteis": sinistros_por_dia.loc[:4].sum(),
+            "Fim de Semana": sinistros_por_dia.loc[5:].sum()
+        }).sort_values(ascending=False)
+        with figura(figsize=(10, 6)) as (fig, ax):
+            bars = ax.bar(fim_semana_vs_uteis.index, fim_semana_vs_uteis.values, color=["orange", "blue"])
+            for bar in bars:
+                yval = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), ha='center', va='bottom')
+            ax.set_xlabel("Categoria")
+            ax.set_ylabel("Quantidade")
+            ax.grid(axis="y", linestyle="--", alpha=0.7)
 
     st.markdown("---")
 
     # Relação entre Logradouros e Veículos
     st.subheader("Relação entre Logradouros e Veículos Envolvidos (2021-2023)")
-    fig, ax = plt.subplots(figsize=(12, 6))
-    relacao_logradouro_veiculos_sorted[veiculos].plot(
-        kind="bar", stacked=True, ax=ax, colormap="viridis"
-    )
-    for container in ax.containers:
-        ax.bar_label(container, fmt="%.0f", label_type="center", fontsize=8, color="white")
-    plt.xlabel("Logradouro")
-    plt.ylabel("Quantidade de Veículos Envolvidos")
-    plt.xticks(rotation=45)
-    plt.grid(axis="y", linestyle="--", alpha=0.7)
-    plt.legend(title="Tipos de Veículos", bbox_to_anchor=(1.05, 1))
-    plt.tight_layout()
-    st.pyplot(fig)
\ No newline at end of file
+    with figura(figsize=(12, 6)) as (fig, ax):
+        relacao_logradouro_veiculos_sorted[veiculos].plot(
+            kind="bar", stacked=True, ax=ax, colormap="viridis"
+        )
+        for container in ax.containers:
+            ax.bar_label(container, fmt="%.0f", label_type="center", fontsize=8, color="white")
+        ax.set_xlabel("Logradouro")
+        ax.set_ylabel("Quantidade de Veículos Envolvidos")
+        ax.tick_params(axis="x", rotation=45)
+        ax.grid(axis="y", linestyle="--", alpha=0.7)
+        ax.legend(title="Tipos de Veículos", bbox_to_anchor=(1.05, 1))
+        fig.tight_layout()
+
+    st.markdown("---")
+
+    # Pontos críticos detectados pela densidade espacial, independente do nome do logradouro
+    st.subheader("Pontos Críticos (2021-2023)")
+    pontos = pontos_criticos(df_filtrado)
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        st.dataframe(
+            pontos.head(20),
+            column_config={
+                "latitude": st.column_config.NumberColumn("Latitude", format="%.5f"),
+                "longitude": st.column_config.NumberColumn("Longitude", format="%.5f"),
+                "Hora predominante": st.column_config.NumberColumn(format="%dh"),
+            },
+            use_container_width=True
+        )
+    with col2:
+        exibir_mapa_pontos_criticos(df_filtrado)
+
+    st.markdown("---")
+
+    # Mudanças de regime por logradouro, detectadas em lote para todos os logradouros
+    st.subheader("Mudanças de Regime por Logradouro (2021-2023)")
+    _, _, mudancas = mudancas_regime(cubo)
+    por_logradouro = mudancas[mudancas["Logradouro"] != SERIE_GERAL]
+    if len(por_logradouro):
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.dataframe(
+                por_logradouro.sort_values("Variação (%)", key=abs, ascending=False).round(1),
+                hide_index=True,
+                use_container_width=True
+            )
+            logradouro = st.selectbox("Logradouro", por_logradouro["Logradouro"].unique(), key="logradouro_regime")
+        with col2:
+            exibir_grafico(criar_grafico_regimes, cubo, logradouro)
+    else:
+        st.info("Nenhuma mudança de regime detectada nos logradouros.")
+
+    st.markdown("---")
+
+    # Consulta por raio a partir de um ponto crítico (índice espacial, sem varrer o DataFrame)
+    st.subheader("Sinistros ao Redor de um Ponto Crítico")
+    if len(pontos):
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            ranking = st.selectbox(
+                "Ponto crítico", pontos.index[:20],
+                format_func=lambda r: f"#{r} - {pontos.loc[r, 'Logradouro predominante']}"
+            )
+            metros = st.slider("Raio (m)", 100, 2000, 500, step=100)
+            centro = pontos.loc[ranking, ["latitude", "longitude"]].to_numpy(dtype=float)
+            indice = indice_espacial(df_filtrado)
+            st.metric(f"Sinistros a até {metros} m", indice.contar_raio(*centro, metros))
+        with col2:
+            posicoes, distancias = indice.vizinhos(*centro, k=10, distancias=True)
+            proximos = df_filtrado.iloc[posicoes][["Data do Sinistro", "Hora do Sinistro", "Logradouro"]]
+            st.dataframe(
+                proximos.assign(**{"Distância (m)": distancias.round().astype(int)}),
+                hide_index=True,
+                use_container_width=True
+            )
@@ -1,10 +1,19 @@
+import numpy as np
+import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
+from figuras import figura, criar_figura, exibir_grafico
+from quilometragem import indice_km, SEGMENTOS_KM
+from calendario import feriados
+from colunas import coluna
+from tendencias import serie_diaria
+from previsao import decomposicao_e_previsao, serie_mensal, MINIMO_MESES_PREVISAO
+from anomalias import anomalias_diarias
+from mudancas import mudancas_regime, SERIE_GERAL
 
-def criar_grafico_temporal(df):
+def criar_grafico_temporal(cubo):
     """Função para criar gráfico temporal que pode ser reutilizada"""
-    sinistros_por_ano = df["Data do Sinistro"].dt.year.value_counts().sort_index()
-    fig, ax = plt.subplots(figsize=(8, 4))
+    sinistros_por_ano = cubo.somar("ano", informados=True)
+    fig, ax = criar_figura(figsize=(8, 4))
     bars = ax.bar(sinistros_por_ano.index, sinistros_por_ano.values, color="#1E88E5")
     
     for bar in bars:
@@ -14,21 +23,41 @@ def criar_grafico_temporal(df):
     
     ax.set_xlabel("Ano", fontsize=10)
     ax.set_ylabel("Quantidade de Sinistros", fontsize=10)
-    plt.grid(axis="y", linestyle="--", alpha=0.7)
-    plt.tight_layout()
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+    fig.tight_layout()
     
     return fig
 
+def criar_grafico_regimes(cubo, serie=SERIE_GERAL):
+    """Sinistros mensais da série (total ou logradouro) com a média de cada regime detectado"""
+    mensal, regimes, mudancas = mudancas_regime(cubo)
+    meses = mensal.index.to_timestamp()
+    fig, ax = criar_figura(figsize=(10, 3.5))
+    ax.bar(meses, mensal[serie], width=20, color="lightgray", label="Sinistros no mês")
+    ax.step(meses, regimes[serie], where="mid", color="#1E88E5", linewidth=2, label="Média do regime")
+    for mes in mudancas.loc[mudancas["Logradouro"] == serie, "Mês"]:
+        # Linha entre o último mês do regime anterior e o primeiro do novo
+        fronteira = pd.Period(mes, freq="M").to_timestamp() - pd.Timedelta(days=15)
+        ax.axvline(fronteira, color="red", linestyle="--", linewidth=1)
+        ax.annotate(mes, (fronteira, ax.get_ylim()[1]), xytext=(3, -10),
+                    textcoords="offset points", fontsize=7, color="red")
+    ax.set_ylabel("Sinistros por Mês", fontsize=8)
+    ax.tick_params(axis="both", labelsize=7)
+    ax.legend(fontsize=7)
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+    fig.tight_layout()
+    return fig
+
 def get_stats(df):
     """Função para obter estatísticas que podem ser reutilizadas"""
     return {
         'total_sinistros': len(df),
-        'media_mensal': len(df) / df["Data do Sinistro"].dt.month.nunique(),
-        'mes_mais_critico': df["Data do Sinistro"].dt.month.mode().iloc[0],
-        'ano_mais_critico': df["Data do Sinistro"].dt.year.mode().iloc[0]
+        'media_mensal': len(df) / coluna(df, "Mês").nunique(),
+        'mes_mais_critico': coluna(df, "Mês").mode().iloc[0],
+        'ano_mais_critico': coluna(df, "Ano").mode().iloc[0]
     }
 
-def tab_analise_temporal(df_filtrado):
+def tab_analise_temporal(df_filtrado, cubo):
     """Função principal para a aba de análise temporal"""
     # Criar duas colunas para os gráficos principais
     col1, col2 = st.columns([0.48, 0.48], gap="large")
@@ -36,47 +65,135 @@ def tab_analise_temporal(df_filtrado):
     with col1:
         # Gráfico de Sinistros por Ano
         st.subheader("Quantidade de Sinistros por Ano (2021-2023)")
-        sinistros_por_ano_filtrado = df_filtrado["Data do Sinistro"].dt.year.value_counts().sort_index()
+        sinistros_por_ano_filtrado = cubo.somar("ano", informados=True)
         
-        fig, ax = plt.subplots(figsize=(5, 3))  # Mantendo o tamanho reduzido para o layout
-        bars = ax.bar(sinistros_por_ano_filtrado.index, sinistros_por_ano_filtrado.values, color="royalblue")
+        with figura(figsize=(5, 3)) as (fig, ax):  # Mantendo o tamanho reduzido para o layout
+            bars = ax.bar(sinistros_por_ano_filtrado.index, sinistros_por_ano_filtrado.values, color="royalblue")
 
-        # Adicionar rótulos acima das barras
-        for bar in bars:
-            yval = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), ha='center', va='bottom')
+            # Adicionar rótulos acima das barras
+            for bar in bars:
+                yval = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), ha='center', va='bottom')
 
-        ax.set_xlabel("Ano", fontsize=8)
-        ax.set_ylabel("Quantidade de Sinistros", fontsize=8)
-        ax.set_xticks(sinistros_por_ano_filtrado.index)
-        ax.grid(axis="y", linestyle="--", alpha=0.7)
-        plt.tight_layout()
-        
-        # Renderizar no Streamlit
-        st.pyplot(fig, use_container_width=True)
+            ax.set_xlabel("Ano", fontsize=8)
+            ax.set_ylabel("Quantidade de Sinistros", fontsize=8)
+            ax.set_xticks(sinistros_por_ano_filtrado.index)
+            ax.grid(axis="y", linestyle="--", alpha=0.7)
+            fig.tight_layout()
 
     with col2:
         # Gráfico de Sinistros por Mês
         st.subheader("Quantidade de Sinistros por Mês (2021-2023)")
-        df_analysis = df_filtrado.copy()
-        df_analysis["Ano/Mês"] = df_analysis["Data do Sinistro"].dt.to_period("M")
-        sinistros_por_mes_filtrado = df_analysis["Ano/Mês"].value_counts().sort_index()
-        fig, ax = plt.subplots(figsize=(5, 3))
-        bars = ax.bar(
-            sinistros_por_mes_filtrado.index.astype(str), 
-            sinistros_por_mes_filtrado.values,
-            color="#1E88E5"
-        )
-        for bar in bars:
-            yval = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), 
-                   ha='center', va='bottom', fontsize=7)
-        ax.set_xlabel("Ano/Mês", fontsize=8)
-        ax.set_ylabel("Quantidade de Sinistros", fontsize=8)
-        plt.xticks(rotation=90, fontsize=7)
+        sinistros_por_mes_filtrado = cubo.somar(("ano", "mes"), informados=True)
+        with figura(figsize=(5, 3)) as (fig, ax):
+            bars = ax.bar(
+                [f"{ano}-{mes:02d}" for ano, mes in sinistros_por_mes_filtrado.index], 
+                sinistros_por_mes_filtrado.values,
+                color="#1E88E5"
+            )
+            for bar in bars:
+                yval = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), 
+                       ha='center', va='bottom', fontsize=7)
+            ax.set_xlabel("Ano/Mês", fontsize=8)
+            ax.set_ylabel("Quantidade de Sinistros", fontsize=8)
+            ax.tick_params(axis="x", rotation=90, labelsize=7)
+            ax.grid(axis="y", linestyle="--", alpha=0.7)
+            fig.tight_layout()
+
+    st.markdown("---")
+
+    # Tendência diária: médias móveis e EWMA da série diária (atualizada incrementalmente)
+    st.subheader("Tendência Diária de Sinistros (2021-2023)")
+    tendencia = serie_diaria(df_filtrado).tabela()
+    with figura(figsize=(12, 3.5)) as (fig, ax):
+        ax.fill_between(tendencia.index, tendencia["Sinistros"], step="mid", color="lightgray", label="Sinistros no dia")
+        for coluna_media, cor in zip([c for c in tendencia.columns if c.startswith("Média")], ["#1E88E5", "darkblue"]):
+            ax.plot(tendencia.index, tendencia[coluna_media], color=cor, linewidth=1.2, label=coluna_media)
+        ax.plot(tendencia.index, tendencia["EWMA"], color="red", linewidth=1, linestyle="--", label="EWMA")
+        # Dias anormais (detector em fluxo), anotados com a data
+        anomalias = anomalias_diarias(df_filtrado)
+        ax.scatter(anomalias.index, anomalias["Sinistros"], color="red", s=18, zorder=3, label="Dia anormal")
+        for data, linha in anomalias.iterrows():
+            ax.annotate(
+                data.strftime("%d/%m/%y"), (data, linha["Sinistros"]), xytext=(0, 4),
+                textcoords="offset points", ha="center", fontsize=6, color="red"
+            )
+        ax.set_ylabel("Sinistros por Dia", fontsize=8)
+        ax.tick_params(axis="both", labelsize=7)
+        ax.legend(fontsize=7, ncol=5)
         ax.grid(axis="y", linestyle="--", alpha=0.7)
-        plt.tight_layout()
-        st.pyplot(fig, use_container_width=True)
+        fig.tight_layout()
+
+    with st.expander(f"Dias com contagem anormal ({len(anomalias)})"):
+        st.dataframe(
+            anomalias.set_axis(anomalias.index.strftime("%d/%m/%Y")).round(2),
+            use_container_width=True
+        )
+
+    st.markdown("---")
+
+    # Decomposição sazonal da série mensal e previsão (em cache por recorte e horizonte)
+    st.subheader("Tendência, Sazonalidade e Previsão Mensal")
+    meses_observados = len(serie_mensal(cubo))
+    if meses_observados < MINIMO_MESES_PREVISAO:
+        st.info(
+            f"A decomposição sazonal e a previsão precisam de pelo menos {MINIMO_MESES_PREVISAO} meses "
+            f"de dados; o recorte selecionado tem {meses_observados}."
+        )
+    else:
+        horizonte = st.select_slider("Meses de previsão", options=[6, 9, 12], value=12, key="horizonte_previsao")
+        decomposicao, previsao = decomposicao_e_previsao(cubo, horizonte)
+        col1, col2 = st.columns([2, 1], gap="large")
+
+        with col1:
+            with figura(figsize=(8, 3.5)) as (fig, ax):
+                observado = decomposicao.index.to_timestamp()
+                futuro = previsao.index.to_timestamp()
+                ax.plot(observado, decomposicao["Sinistros"], color="#1E88E5", marker="o", markersize=3, label="Sinistros")
+                ax.plot(observado, decomposicao["Tendência"], color="darkblue", linewidth=2, label="Tendência")
+                ax.plot(futuro, previsao["Previsto"], color="red", marker="o", markersize=3, linestyle="--", label="Previsão")
+                ax.fill_between(
+                    futuro, previsao["Limite inferior"], previsao["Limite superior"],
+                    color="red", alpha=0.15, label="Intervalo de 95%"
+                )
+                ax.set_ylabel("Sinistros por Mês", fontsize=8)
+                ax.tick_params(axis="both", labelsize=7)
+                ax.legend(fontsize=7, ncol=4)
+                ax.grid(axis="y", linestyle="--", alpha=0.7)
+                fig.tight_layout()
+
+        with col2:
+            # Índice sazonal de cada mês do calendário (desvio em relação à tendência)
+            sazonal = decomposicao.groupby(decomposicao.index.month)["Sazonalidade"].first()
+            with figura(figsize=(4, 3.5)) as (fig, ax):
+                cores = np.where(sazonal.to_numpy() >= 0, "#1E88E5", "lightgray")
+                ax.bar(sazonal.index, sazonal.to_numpy(), color=cores)
+                ax.axhline(0, color="black", linewidth=0.8)
+                ax.set_xticks(range(1, 13))
+                ax.set_xlabel("Mês", fontsize=8)
+                ax.set_ylabel("Efeito Sazonal (sinistros)", fontsize=8)
+                ax.tick_params(axis="both", labelsize=7)
+                ax.grid(axis="y", linestyle="--", alpha=0.7)
+                fig.tight_layout()
+
+        with st.expander("Previsão detalhada"):
+            st.dataframe(
+                previsao.set_axis(previsao.index.astype(str)).round(1),
+                use_container_width=True
+            )
+
+    st.markdown("---")
+
+    # Mudanças de regime na série mensal total (segmentação binária sobre o cubo)
+    st.subheader("Mudanças de Regime nos Sinistros Mensais (2021-2023)")
+    exibir_grafico(criar_grafico_regimes, cubo)
+    _, _, mudancas = mudancas_regime(cubo)
+    geral = mudancas[mudancas["Logradouro"] == SERIE_GERAL].drop(columns="Logradouro")
+    if len(geral):
+        st.dataframe(geral.round(1), hide_index=True, use_container_width=True)
+    else:
+        st.info("Nenhuma mudança de regime detectada na série mensal.")
 
     st.markdown("---")
     
@@ -84,48 +201,80 @@ def tab_analise_temporal(df_filtrado):
     col1, col2 = st.columns([1, 1], gap="large")
 
     with col1:
-        # Gráfico de Sinistros por KM
-        if "Numero/KM" in df_filtrado.columns:
-            st.subheader("KM com Mais Sinistros (2021-2023)")
-            sinistros_por_km_filtrado = df_filtrado["Numero/KM"].value_counts().sort_values(ascending=False).head(10)
-            fig, ax = plt.subplots(figsize=(5, 3))
+        # Gráfico de Sinistros por trecho de KM (quilometragem numérica, não o texto da coluna)
+        indice = indice_km(df_filtrado)
+        if len(indice):
+            st.subheader("Trechos de KM com Mais Sinistros (2021-2023)")
+            tamanho = st.select_slider(
+                "Comprimento do trecho (km)", options=list(SEGMENTOS_KM), value=1.0, key="trecho_km"
+            )
+            km_min, km_max = float(np.floor(indice.km[0])), float(np.ceil(indice.km[-1]))
+            km_inicio, km_fim = st.slider(
+                "Intervalo de KM", km_min, max(km_max, km_min + 1), (km_min, max(km_max, km_min + 1)),
+                step=0.5, key="intervalo_km"
+            )
+            trechos = indice.segmentos(tamanho, km_inicio, km_fim)
+            top_trechos = trechos.sort_values("Sinistros", ascending=False, kind="stable").head(10)
+            with figura(figsize=(5, 3)) as (fig, ax):
+                bars = ax.bar(
+                    [f"{inicio:g}-{fim:g}" for inicio, fim in zip(top_trechos["KM inicial"], top_trechos["KM final"])],
+                    top_trechos["Sinistros"],
+                    color="#1E88E5"
+                )
+                for bar in bars:
+                    yval = bar.get_height()
+                    ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), 
+                           ha='center', va='bottom', fontsize=7)
+                ax.set_xlabel("Trecho (KM)", fontsize=8)
+                ax.set_ylabel("Quantidade", fontsize=8)
+                ax.tick_params(axis="x", rotation=45, labelsize=7)
+                fig.tight_layout()
+            st.caption(
+                f"{indice.contar(km_inicio, km_fim)} sinistros entre o KM {km_inicio:g} e o KM {km_fim:g}"
+            )
+            st.dataframe(top_trechos, hide_index=True, use_container_width=True)
+
+    with col2:
+        # Gráfico de Sinistros por Mês (Agrupado)
+        st.subheader("Total de Sinistros por Mês (2021-2023)")
+        sinistros_por_mes_agrupado = cubo.somar("mes", informados=True)
+        with figura(figsize=(5, 3)) as (fig, ax):
             bars = ax.bar(
-                sinistros_por_km_filtrado.index.astype(str),
-                sinistros_por_km_filtrado.values,
-                color="#1E88E5"
+                sinistros_por_mes_agrupado.index,
+                sinistros_por_mes_agrupado.values,
+                color="#1E88E5",
+                tick_label=[
+                    "Jan", "Fev", "Mar", "Abr", "Mai", "Jun",
+                    "Jul", "Ago", "Set", "Out", "Nov", "Dez"
+                ]
             )
             for bar in bars:
                 yval = bar.get_height()
                 ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), 
                        ha='center', va='bottom', fontsize=7)
-            ax.set_xlabel("KM", fontsize=8)
+            ax.set_xlabel("Mês", fontsize=8)
             ax.set_ylabel("Quantidade", fontsize=8)
-            plt.xticks(rotation=45, fontsize=7)
-            plt.tight_layout()
-            st.pyplot(fig, use_container_width=True)
+            ax.tick_params(axis="x", rotation=45, labelsize=7)
+            fig.tight_layout()
 
-    with col2:
-        # Gráfico de Sinistros por Mês (Agrupado)
-        st.subheader("Total de Sinistros por Mês (2021-2023)")
-        df_analysis = df_filtrado.copy()
-        df_analysis["Mês"] = df_analysis["Data do Sinistro"].dt.month
-        sinistros_por_mes_agrupado = df_analysis["Mês"].value_counts().sort_index()
-        fig, ax = plt.subplots(figsize=(5, 3))
-        bars = ax.bar(
-            sinistros_por_mes_agrupado.index,
-            sinistros_por_mes_agrupado.values,
-            color="#1E88E5",
-            tick_label=[
-                "Jan", "Fev", "Mar", "Abr", "Mai", "Jun",
-                "Jul", "Ago", "Set", "Out", "Nov", "Dez"
-            ]
-        )
+    st.markdown("---")
+
+    # Feriados vs dias normais a partir da coluna "Feriado" calculada na carga
+    st.subheader("Média Diária de Sinistros: Feriados vs. Dias Normais (2021-2023)")
+    anos = coluna(df_filtrado, "Ano").dropna().unique()
+    dias_no_periodo = sum(366 if pd.Timestamp(int(ano), 1, 1).is_leap_year else 365 for ano in anos)
+    dias_feriado = len(feriados(int(ano) for ano in anos).index.unique())
+    sinistros_feriado = int(df_filtrado["Feriado"].sum())
+    media_diaria = pd.Series({
+        "Feriados": sinistros_feriado / max(dias_feriado, 1),
+        "Dias Normais": (len(df_filtrado) - sinistros_feriado) / max(dias_no_periodo - dias_feriado, 1)
+    })
+    with figura(figsize=(6, 3)) as (fig, ax):
+        bars = ax.bar(media_diaria.index, media_diaria.values, color=["purple", "#1E88E5"])
         for bar in bars:
             yval = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2, yval, int(yval), 
-                   ha='center', va='bottom', fontsize=7)
-        ax.set_xlabel("Mês", fontsize=8)
-        ax.set_ylabel("Quantidade", fontsize=8)
-        plt.xticks(rotation=45, fontsize=7)
-        plt.tight_layout()
-        st.pyplot(fig, use_container_width=True)
\ No newline at end of file
+            ax.text(bar.get_x() + bar.get_width()/2, yval, f"{yval:.2f}", ha='center', va='bottom', fontsize=8)
+        ax.set_ylabel("Sinistros por Dia", fontsize=8)
+        ax.grid(axis="y", linestyle="--", alpha=0.7)
+        fig.tight_layout()
+    st.caption(f"{sinistros_feriado} sinistros em {dias_feriado} feriados no período")
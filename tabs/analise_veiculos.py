@@ -1,10 +1,10 @@
 import streamlit as st
-import matplotlib.pyplot as plt
+from figuras import figura, criar_figura, exibir_grafico
 
-def criar_grafico_veiculos(df, veiculos):
+def criar_grafico_veiculos(cubo, veiculos):
     """Função para criar gráfico de veículos que pode ser reutilizada"""
-    total_por_tipo = df[veiculos].sum().sort_values(ascending=True)
-    fig, ax = plt.subplots(figsize=(10, 6))
+    total_por_tipo = cubo.somar(veiculos=True)[veiculos].sort_values(ascending=True)
+    fig, ax = criar_figura(figsize=(10, 6))
     bars = ax.barh(range(len(total_por_tipo)), total_por_tipo.values, color="#1E88E5")
     ax.set_yticks(range(len(total_por_tipo)))
     ax.set_yticklabels(total_por_tipo.index)
@@ -14,15 +14,14 @@ def criar_grafico_veiculos(df, veiculos):
         ax.text(width, bar.get_y() + bar.get_height()/2, int(width), 
                ha='left', va='center')
     
-    plt.xlabel("Quantidade")
-    plt.ylabel("Tipo de Veículo")
-    plt.grid(axis="x", linestyle="--", alpha=0.7)
-    plt.tight_layout()
+    ax.set_xlabel("Quantidade")
+    ax.set_ylabel("Tipo de Veículo")
+    ax.grid(axis="x", linestyle="--", alpha=0.7)
+    fig.tight_layout()
     
     return fig
 
-def tab_analise_veiculos(df_filtrado, veiculos, relacao_logradouro_veiculos_sorted):
-    df_analysis = df_filtrado.copy()
+def tab_analise_veiculos(cubo, veiculos, relacao_logradouro_veiculos_sorted):
     col1, col2 = st.columns(2)
     
     with col1:
@@ -32,21 +31,19 @@ def tab_analise_veiculos(df_filtrado, veiculos, relacao_logradouro_veiculos_sort
         logradouro_top = relacao_logradouro_veiculos_sorted.index[0]
         dados_top_logradouro = relacao_logradouro_veiculos_sorted.loc[logradouro_top, veiculos]
         
-        fig, ax = plt.subplots(figsize=(10, 10))
-        plt.pie(
-            dados_top_logradouro,
-            labels=veiculos,
-            autopct="%1.1f%%",
-            colors=cores_personalizadas,
-            startangle=90,
-            wedgeprops={"edgecolor": "black"}
-        )
-        plt.title(f"Proporção de Veículos no {logradouro_top}")
-        plt.axis("equal")
-        st.pyplot(fig)
+        with figura(figsize=(10, 10)) as (fig, ax):
+            ax.pie(
+                dados_top_logradouro,
+                labels=veiculos,
+                autopct="%1.1f%%",
+                colors=cores_personalizadas,
+                startangle=90,
+                wedgeprops={"edgecolor": "black"}
+            )
+            ax.set_title(f"Proporção de Veículos no {logradouro_top}")
+            ax.axis("equal")
     
     with col2:
         # Gráfico de comparação de veículos por tipo
         st.subheader("Comparação de Veículos por Tipo (2021-2023)")
-        fig = criar_grafico_veiculos(df_analysis, veiculos)
-        st.pyplot(fig)
\ No newline at end of file
+        exibir_grafico(criar_grafico_veiculos, cubo, veiculos)
\ No newline at end of file
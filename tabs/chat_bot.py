@@ -3,9 +3,14 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-import folium
-from folium.plugins import HeatMap
-from streamlit_folium import folium_static
+
+from cache_versao import MAXIMO_VERSOES
+from figuras import exibir_grafico
+from mapas import exibir_mapa_calor
+from pontos_criticos import pontos_criticos
+from indice_espacial import indice_espacial
+from colunas import coluna
+from previsao import decomposicao_e_previsao
 
 from langchain.chat_models import ChatOpenAI
 from langchain.chains import ConversationalRetrievalChain
@@ -16,7 +21,36 @@ from langchain.vectorstores import FAISS
 from langchain.prompts import PromptTemplate
 
 
-def tab_chat_bot(df_filtrado, df_completo, relacao_logradouro_veiculos_sorted, funcoes_graficos):
+def resumo_espacial(df, raios=(250, 500, 1000), top_n=5):
+    """Sinistros ao redor dos principais pontos críticos, para a base de conhecimento"""
+    indice = indice_espacial(df)
+    linhas = []
+    for ranking, ponto in pontos_criticos(df).head(top_n).iterrows():
+        contagens = ", ".join(
+            f"{indice.contar_raio(ponto['latitude'], ponto['longitude'], metros)} em {metros} m" for metros in raios
+        )
+        linhas.append(
+            f"        - Ponto crítico #{ranking} ({ponto['Logradouro predominante']}, "
+            f"lat {ponto['latitude']:.5f}, lon {ponto['longitude']:.5f}): {contagens}"
+        )
+    return "\n".join(linhas)
+
+def resumo_previsao(cubo, meses=6):
+    """Tendência recente e previsão dos próximos meses, para a base de conhecimento"""
+    decomposicao, previsao = decomposicao_e_previsao(cubo)
+    tendencia = decomposicao["Tendência"].dropna()
+    linhas = [
+        f"        - Tendência (média móvel de 12 meses): {tendencia.iloc[0]:.1f} sinistros/mês "
+        f"em {tendencia.index[0]} e {tendencia.iloc[-1]:.1f} em {tendencia.index[-1]}"
+    ] if len(tendencia) else []
+    for mes, linha in previsao.head(meses).iterrows():
+        linhas.append(
+            f"        - Previsão {mes}: {linha['Previsto']:.0f} sinistros "
+            f"(intervalo de 95%: {linha['Limite inferior']:.0f} a {linha['Limite superior']:.0f})"
+        )
+    return "\n".join(linhas)
+
+def tab_chat_bot(df_filtrado, df_completo, cubo, relacao_logradouro_veiculos_sorted, funcoes_graficos):
     """
     Cria a aba do Chat Bot para análise de sinistros, integrando a análise dos dados com
     o modelo de linguagem e as visualizações gráficas.
@@ -89,18 +123,24 @@ Responda de forma clara e direta, usando dados específicos para suportar suas a
 Resposta:"""
 
     # Função para criar a base de conhecimento a partir dos dados
-    @st.cache_resource
-    def criar_base_conhecimento(df, relacao_veiculos):
+    @st.cache_resource(max_entries=MAXIMO_VERSOES)
+    def criar_base_conhecimento(df, relacao_veiculos, consultas_espaciais, previsao_mensal):
         descricao_dashboard = f"""
         Análise do Dataset de Sinistros (2021-2023):
 
         Estatísticas Gerais:
         - Total de registros: {len(df)}
-        - Média diária: {len(df) / df['Data do Sinistro'].dt.date.nunique():.1f} sinistros
+        - Média diária: {len(df) / coluna(df, 'Data').nunique():.1f} sinistros
         - Horário com mais ocorrências: {df['Hora do Sinistro'].mode().iloc[0]}h
         - Local com mais registros: {df['Logradouro'].mode().iloc[0]}
         - Coordenadas médias: Latitude {df['latitude'].mean():.4f}, Longitude {df['longitude'].mean():.4f}
 
+        Sinistros ao redor dos pontos críticos (por raio):
+{consultas_espaciais}
+
+        Tendência e previsão mensal (decomposição sazonal):
+{previsao_mensal}
+
         Análises Disponíveis:
         1. Temporal:
         - Evolução anual dos sinistros
@@ -154,7 +194,9 @@ Resposta:"""
         return chatbot
 
     # Inicializar base de conhecimento e chatbot
-    vectorstore = criar_base_conhecimento(df_filtrado, relacao_logradouro_veiculos_sorted)
+    vectorstore = criar_base_conhecimento(
+        df_filtrado, relacao_logradouro_veiculos_sorted, resumo_espacial(df_filtrado), resumo_previsao(cubo)
+    )
     chatbot = criar_chatbot(vectorstore)
 
     # Inicializar histórico da conversa (mantém as mensagens anteriores)
@@ -202,90 +244,27 @@ Resposta:"""
                     if "moto" in user_input.lower() or "motocicleta" in user_input.lower():
                         # Mapa de calor específico para motos
                         st.subheader("Mapa de Calor - Sinistros com Motocicletas")
-                        df_moto = df_filtrado[
-                            (df_filtrado["Motocicleta envolvida"] > 0) & 
-                            df_filtrado["latitude"].notna() & 
-                            df_filtrado["longitude"].notna()
-                        ].copy()
-                        df_moto["latitude"] = df_moto["latitude"].astype(str).str.replace(",", ".").astype(float)
-                        df_moto["longitude"] = df_moto["longitude"].astype(str).str.replace(",", ".").astype(float)
-                        df_moto["count"] = df_moto.groupby(["latitude", "longitude"])["latitude"].transform("count")
-                        
-                        mapa_calor_motos = folium.Map(
-                            location=[df_moto["latitude"].mean(), df_moto["longitude"].mean()],
-                            zoom_start=12
-                        )
-                        
-                        heat_data_moto = list(zip(
-                            df_moto["latitude"],
-                            df_moto["longitude"],
-                            df_moto["count"]
-                        ))
-                        
-                        HeatMap(
-                            heat_data_moto,
-                            radius=15,
-                            blur=20,
-                            min_opacity=0.5,
-                            max_zoom=15
-                        ).add_to(mapa_calor_motos)
-                        
-                        # Adiciona marcadores com os números dos sinistros
-                        for _, row in df_moto.drop_duplicates(subset=["latitude", "longitude"]).iterrows():
-                            folium.Marker(
-                                location=[row["latitude"], row["longitude"]],
-                                icon=folium.DivIcon(html=f'<b style="font-size: 10pt; color: red;">{int(row["count"])}</b>')
-                            ).add_to(mapa_calor_motos)
-                        
-                        folium_static(mapa_calor_motos, width=700)
+                        exibir_mapa_calor(df_filtrado, "moto", width=700)
                     else:
                         # Mapa de calor geral
                         st.subheader("Mapa de Calor - Todos os Sinistros")
-                        df_mapa = df_filtrado.dropna(subset=["latitude", "longitude"]).copy()
-                        df_mapa["latitude"] = df_mapa["latitude"].astype(str).str.replace(",", ".").astype(float)
-                        df_mapa["longitude"] = df_mapa["longitude"].astype(str).str.replace(",", ".").astype(float)
-                        df_mapa["count"] = df_mapa.groupby(["latitude", "longitude"])["latitude"].transform("count")
-                        
-                        mapa_calor = folium.Map(
-                            location=[df_mapa["latitude"].mean(), df_mapa["longitude"].mean()],
-                            zoom_start=12
-                        )
-                        
-                        heat_data = list(zip(
-                            df_mapa["latitude"],
-                            df_mapa["longitude"],
-                            df_mapa["count"]
-                        ))
-                        
-                        HeatMap(heat_data, radius=10, blur=15).add_to(mapa_calor)
-                        
-                        # Adiciona marcadores com os números dos sinistros
-                        for _, row in df_mapa.drop_duplicates(subset=["latitude", "longitude"]).iterrows():
-                            folium.Marker(
-                                location=[row["latitude"], row["longitude"]],
-                                icon=folium.DivIcon(html=f'<b style="font-size: 10pt; color: black;">{int(row["count"])}</b>')
-                            ).add_to(mapa_calor)
-                        
-                        folium_static(mapa_calor, width=700)
+                        exibir_mapa_calor(df_filtrado, "geral", width=700)
                 # Visualização: Gráfico de Horário
                 elif contem_palavras("horario", user_input):
                     try:
-                        fig = funcoes_graficos['criar_grafico_horario'](df_filtrado)
-                        st.pyplot(fig)
+                        exibir_grafico(funcoes_graficos['criar_grafico_horario'], cubo)
                     except Exception as e:
                         st.error("Erro ao gerar gráfico de horário: " + str(e))
                 # Visualização: Gráfico de Local
                 elif contem_palavras("local", user_input):
                     try:
-                        fig = funcoes_graficos['criar_grafico_local'](df_filtrado)
-                        st.pyplot(fig)
+                        exibir_grafico(funcoes_graficos['criar_grafico_local'], cubo)
                     except Exception as e:
                         st.error("Erro ao gerar gráfico de local: " + str(e))
                 # Visualização: Gráfico Temporal
                 elif contem_palavras("anual", user_input):
                     try:
-                        fig = funcoes_graficos['criar_grafico_temporal'](df_filtrado)
-                        st.pyplot(fig)
+                        exibir_grafico(funcoes_graficos['criar_grafico_temporal'], cubo)
                     except Exception as e:
                         st.error("Erro ao gerar gráfico temporal: " + str(e))
                 # Visualização: Gráfico de Veículos
@@ -299,8 +278,7 @@ Resposta:"""
                             "Ônibus  envolvido",
                             "Outros veículos envolvidos"
                         ]
-                        fig = funcoes_graficos['criar_grafico_veiculos'](df_filtrado, veiculos)
-                        st.pyplot(fig)
+                        exibir_grafico(funcoes_graficos['criar_grafico_veiculos'], cubo, veiculos)
                     except Exception as e:
                         st.error("Erro ao gerar gráfico de veículos: " + str(e))
 
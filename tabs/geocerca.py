@@ -0,0 +1,53 @@
+import streamlit as st
+import folium
+from folium.plugins import Draw
+from streamlit_folium import st_folium
+
+from config import MAP_ZOOM
+from data import filtrar_periodo
+from espacial import celulas_sinistros, centro_celulas, filtrar_poligono
+
+def vertices_desenho(desenho):
+    """Anel externo do polígono/retângulo desenhado (GeoJSON) como [[lat, lon], ...]"""
+    if not desenho or desenho.get("geometry", {}).get("type") != "Polygon":
+        return None
+    return [[lat, lon] for lon, lat in desenho["geometry"]["coordinates"][0]]
+
+def recorte_geocerca(df, vertices, ano_inicio, ano_fim):
+    """
+    Sinistros dentro da área desenhada, ou None quando a área não tem sinistros no
+    período analisado pelas abas (o recorte por ano ficaria vazio).
+    """
+    df_area = filtrar_poligono(df, vertices)
+    return df_area if len(filtrar_periodo(df_area, ano_inicio, ano_fim)) else None
+
+def seletor_geocerca(df):
+    """
+    Mapa na barra lateral para desenhar a área de análise. O polígono fica na sessão
+    e é aplicado pelo app a todas as abas; retorna os vértices ou None.
+    """
+    with st.sidebar.expander("Área de análise", expanded="geocerca" in st.session_state):
+        mapa = folium.Map(location=centro_celulas(celulas_sinistros(df)), zoom_start=MAP_ZOOM - 1)
+        Draw(
+            draw_options={
+                "polyline": False, "circle": False, "marker": False, "circlemarker": False,
+                "polygon": True, "rectangle": True
+            },
+            edit_options={"edit": False}
+        ).add_to(mapa)
+        retorno = st_folium(
+            mapa, height=300, width=None, use_container_width=True,
+            returned_objects=["last_active_drawing"], key="mapa_geocerca"
+        )
+
+        # O componente continua devolvendo o último desenho; só um desenho novo muda a área
+        vertices = vertices_desenho((retorno or {}).get("last_active_drawing"))
+        if vertices and vertices != st.session_state.get("geocerca_desenho"):
+            st.session_state["geocerca_desenho"] = vertices
+            st.session_state["geocerca"] = vertices
+        if "geocerca" in st.session_state:
+            st.caption(f"Área com {len(st.session_state['geocerca']) - 1} vértices aplicada a todas as abas")
+            if st.button("Limpar área"):
+                del st.session_state["geocerca"]
+                st.rerun()
+    return st.session_state.get("geocerca")
@@ -1,7 +1,26 @@
 import streamlit as st
-import folium
-from folium.plugins import HeatMap
-from streamlit_folium import folium_static
+from espacial import quadros_sinistros
+from mapas import ESTILOS_CALOR, exibir_mapa_calor, exibir_mapa_quadro
+
+# Quadros disponíveis na animação: rótulo exibido -> agrupamento de quadros_sinistros
+QUADROS_ANIMACAO = {"Mês": "mes", "Hora do dia": "hora"}
+
+@st.fragment
+def animacao_mapas(df_filtrado):
+    """
+    Mapa de calor quadro a quadro. Como fragmento, mover o controle reexecuta só esta
+    função; as células de todos os quadros já estão em cache e cada mapa é montado
+    apenas quando o seu quadro é exibido pela primeira vez.
+    """
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        por = QUADROS_ANIMACAO[st.radio("Quadros por", list(QUADROS_ANIMACAO), horizontal=True, key="animacao_por")]
+    with col2:
+        estilo = "moto" if st.checkbox("Somente motocicletas", key="animacao_motos") else "geral"
+
+    rotulos, _ = quadros_sinistros(df_filtrado, por, veiculo=ESTILOS_CALOR[estilo]["veiculo"])
+    rotulo = st.select_slider("Quadro", options=rotulos, key=f"animacao_quadro_{por}")
+    exibir_mapa_quadro(df_filtrado, por, rotulos.index(rotulo), estilo)
 
 def tab_mapas_calor(df_filtrado):
     # Ajustar o layout para melhor distribuição
@@ -27,64 +46,11 @@ def tab_mapas_calor(df_filtrado):
     
     with col1:
         st.markdown('<p class="map-title">Sinistros com Motocicletas (2021-2023)</p>', unsafe_allow_html=True)
-        
-        # Filtrar dados e criar mapa de motos
-        df_moto = df_filtrado[
-            (df_filtrado["Motocicleta envolvida"] > 0) & 
-            df_filtrado["latitude"].notna() & 
-            df_filtrado["longitude"].notna()
-        ].copy()
-        
-        df_moto["latitude"] = df_moto["latitude"].astype(str).str.replace(",", ".").astype(float)
-        df_moto["longitude"] = df_moto["longitude"].astype(str).str.replace(",", ".").astype(float)
-        df_moto["count"] = df_moto.groupby(["latitude", "longitude"])["latitude"].transform("count")
-        
-        mapa_calor_motos = folium.Map(
-            location=[df_moto["latitude"].mean(), df_moto["longitude"].mean()],
-            zoom_start=12,
-            width=650,
-            height=500
-        )
-        
-        heat_data_moto = list(zip(df_moto["latitude"], df_moto["longitude"], df_moto["count"]))
-        HeatMap(
-            heat_data_moto,
-            radius=15,
-            blur=20,
-            min_opacity=0.5,
-            max_zoom=15
-        ).add_to(mapa_calor_motos)
-        
-        for _, row in df_moto.drop_duplicates(subset=["latitude", "longitude"]).iterrows():
-            folium.Marker(
-                location=[row["latitude"], row["longitude"]],
-                icon=folium.DivIcon(html=f'<b style="font-size: 10pt; color: red;">{int(row["count"])}</b>')
-            ).add_to(mapa_calor_motos)
-        
-        folium_static(mapa_calor_motos, width=650, height=500)
+        exibir_mapa_calor(df_filtrado, "moto")
 
     with col2:
         st.markdown('<p class="map-title">Todos os Sinistros (2021-2023)</p>', unsafe_allow_html=True)
-        
-        df_mapa = df_filtrado.dropna(subset=["latitude", "longitude"]).copy()
-        df_mapa["latitude"] = df_mapa["latitude"].astype(str).str.replace(",", ".").astype(float)
-        df_mapa["longitude"] = df_mapa["longitude"].astype(str).str.replace(",", ".").astype(float)
-        df_mapa["count"] = df_mapa.groupby(["latitude", "longitude"])["latitude"].transform("count")
-        
-        mapa_calor = folium.Map(
-            location=[df_mapa["latitude"].mean(), df_mapa["longitude"].mean()],
-            zoom_start=12,
-            width=650,
-            height=500
-        )
-        
-        heat_data = list(zip(df_mapa["latitude"], df_mapa["longitude"], df_mapa["count"]))
-        HeatMap(heat_data, radius=10, blur=15).add_to(mapa_calor)
-        
-        for _, row in df_mapa.drop_duplicates(subset=["latitude", "longitude"]).iterrows():
-            folium.Marker(
-                location=[row["latitude"], row["longitude"]],
-                icon=folium.DivIcon(html=f'<b style="font-size: 10pt; color: black;">{int(row["count"])}</b>')
-            ).add_to(mapa_calor)
-        
-        folium_static(mapa_calor, width=650, height=500)
\ No newline at end of file
+        exibir_mapa_calor(df_filtrado, "geral")
+
+    st.markdown('<p class="map-title">Evolução dos Pontos Críticos</p>', unsafe_allow_html=True)
+    animacao_mapas(df_filtrado)
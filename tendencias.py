@@ -0,0 +1,151 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cache_versao import MAXIMO_VERSOES, em_cache_por_versao, versao_dos_dados
+from colunas import coluna
+
+# Janelas das médias móveis (dias) e span da média móvel exponencial
+JANELAS_MEDIA = (7, 30)
+SPAN_EWMA = 14
+
+def impressao_registros(ids, datas):
+    """
+    Hash dos pares (id, dia) que não depende da ordem das linhas: soma (módulo 2⁶⁴)
+    dos hashes de cada registro, que pode ser acumulada a cada lote acrescentado.
+    """
+    registros = pd.DataFrame({"id": pd.Series(ids).to_numpy(), "dia": pd.to_datetime(pd.Series(datas)).dt.normalize().to_numpy()})
+    return int(pd.util.hash_pandas_object(registros, index=False).to_numpy().sum(dtype=np.uint64))
+
+class SerieDiaria:
+    """
+    Sinistros por dia do calendário (dias sem registro = 0), com a soma acumulada e
+    a média móvel exponencial (EWMA) já calculadas.
+
+    As médias móveis saem da soma acumulada em O(dias). Registros novos entram por
+    acrescentar(): só os dias a partir do mais antigo alterado são recalculados.
+    """
+
+    def __init__(self, datas, ids=None, span=SPAN_EWMA):
+        self.alpha = 2 / (span + 1)
+        dias = pd.to_datetime(pd.Series(datas)).dropna().dt.normalize()
+        self.inicio = dias.min() if len(dias) else pd.Timestamp.today().normalize()
+        self.contagens = np.zeros(0, dtype=np.int64)
+        self.acumulado = np.zeros(0, dtype=np.int64)
+        self.ewma = np.zeros(0, dtype=np.float64)
+        self.ids = set()
+        self.impressao = 0  # impressao_registros dos registros com id já somados
+        self.acrescentar(datas, ids)
+
+    def __len__(self):
+        return len(self.contagens)
+
+    def copiar(self):
+        """Cópia independente, para atualizar sem alterar a série compartilhada"""
+        copia = SerieDiaria.__new__(SerieDiaria)
+        copia.alpha, copia.inicio = self.alpha, self.inicio
+        copia.contagens, copia.acumulado, copia.ewma = self.contagens.copy(), self.acumulado.copy(), self.ewma.copy()
+        copia.ids, copia.impressao = set(self.ids), self.impressao
+        return copia
+
+    def acrescentar(self, datas, ids=None):
+        """Soma os registros novos (datas, e ids opcionais para evitar duplicidade)"""
+        datas = pd.to_datetime(pd.Series(datas)).reset_index(drop=True)
+        if ids is not None:
+            ids = pd.Series(ids).reset_index(drop=True)
+            novos = ~ids.isin(self.ids).to_numpy()
+            datas = datas[novos]
+            self.ids.update(ids[novos].tolist())
+            self.impressao = (self.impressao + impressao_registros(ids[novos], datas)) % 2 ** 64
+        dias = datas.dropna().dt.normalize()
+        if not len(dias):
+            return self
+
+        # Registros anteriores ao início deslocam a série para trás
+        if dias.min() < self.inicio:
+            deslocamento = (self.inicio - dias.min()).days
+            self.contagens = np.concatenate([np.zeros(deslocamento, dtype=np.int64), self.contagens])
+            self.inicio = dias.min()
+            primeiro_alterado = 0
+        else:
+            primeiro_alterado = (dias.min() - self.inicio).days
+
+        posicoes = ((dias - self.inicio).dt.days).to_numpy()
+        total = max(len(self.contagens), int(posicoes.max()) + 1)
+        self.contagens = np.pad(self.contagens, (0, total - len(self.contagens)))
+        self.contagens += np.bincount(posicoes, minlength=total)
+        self._recalcular_a_partir(min(primeiro_alterado, len(self.acumulado)))
+        return self
+
+    def _recalcular_a_partir(self, dia):
+        """Refaz soma acumulada e EWMA só do `dia` em diante, partindo do estado anterior"""
+        base = self.acumulado[dia - 1] if dia > 0 else 0
+        self.acumulado = np.concatenate([self.acumulado[:dia], base + np.cumsum(self.contagens[dia:])])
+
+        sufixo = self.contagens[dia:].astype(np.float64)
+        if dia > 0:
+            # O último valor conhecido entra como semente e é descartado depois
+            sufixo = np.concatenate([[self.ewma[dia - 1]], sufixo])
+        ewma = pd.Series(sufixo).ewm(alpha=self.alpha, adjust=False).mean().to_numpy()
+        self.ewma = np.concatenate([self.ewma[:dia], ewma[1:] if dia > 0 else ewma])
+
+    def media_movel(self, janela):
+        """Média dos últimos `janela` dias (janelas incompletas no início: NaN)"""
+        media = np.full(len(self), np.nan)
+        if len(self) >= janela:
+            anteriores = np.concatenate([[0], self.acumulado[:-janela]])
+            media[janela - 1:] = (self.acumulado[janela - 1:] - anteriores) / janela
+        return media
+
+    def tabela(self, janelas=JANELAS_MEDIA):
+        """DataFrame por dia: sinistros, médias móveis das janelas e EWMA"""
+        tabela = pd.DataFrame(
+            {"Sinistros": self.contagens},
+            index=pd.date_range(self.inicio, periods=len(self), freq="D", name="Data")
+        )
+        for janela in janelas:
+            tabela[f"Média {janela} dias"] = self.media_movel(janela)
+        tabela["EWMA"] = self.ewma
+        return tabela
+
+def _so_acrescentados(anterior, datas, ids):
+    """Os registros da série anterior continuam todos no recorte, com as mesmas datas"""
+    ja_somados = ids.isin(anterior.ids).to_numpy()
+    return (
+        ids[ja_somados].nunique() == len(anterior.ids)
+        and impressao_registros(ids[ja_somados], datas[ja_somados]) == anterior.impressao
+    )
+
+# Última série de cada recorte (versão sem o fingerprint), para atualizar incrementalmente
+_ultimas_series = {}
+_lock_series = threading.Lock()
+
+@em_cache_por_versao(recurso=True)
+def serie_diaria(df):
+    """
+    Série diária do recorte, uma por versão dos dados. Quando a planilha só ganhou
+    registros (ids anteriores preservados, com as mesmas datas), a série da versão
+    anterior é atualizada com os novos em vez de recalculada.
+    """
+    versao = versao_dos_dados(df)
+    datas = coluna(df, "Data")
+    ids = df["id_sinistro"] if "id_sinistro" in df.columns else None
+    recorte = versao.partition("|")[2] if versao else None
+
+    with _lock_series:
+        anterior = _ultimas_series.get(recorte)
+    if anterior is not None and ids is not None and _so_acrescentados(anterior, datas, ids):
+        # Mesma consulta sobre dados que só ganharam registros: aplicar apenas os novos
+        serie = anterior.copiar().acrescentar(datas, ids)
+    else:
+        serie = SerieDiaria(datas, ids)
+
+    if versao:
+        with _lock_series:
+            _ultimas_series.pop(recorte, None)
+            _ultimas_series[recorte] = serie
+            # Só os recortes usados mais recentemente (cada polígono é um recorte)
+            while len(_ultimas_series) > MAXIMO_VERSOES:
+                del _ultimas_series[next(iter(_ultimas_series))]
+    return serie
@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Os módulos do app ficam na raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import VEICULOS, adicionar_calendario, aplicar_schema
+
+def gerar_sinistros(quantidade=500, semente=0, inicio="2021-01-01", fim="2023-12-31"):
+    """DataFrame sintético no formato do load_data (schema e colunas de calendário)"""
+    aleatorio = np.random.default_rng(semente)
+    dias = pd.date_range(inicio, fim, freq="D")
+    df = pd.DataFrame({
+        "id_sinistro": np.arange(quantidade),
+        "Data do Sinistro": aleatorio.choice(dias, quantidade),
+        "Hora do Sinistro": aleatorio.integers(0, 24, quantidade).astype(float),
+        "Logradouro": aleatorio.choice(["RODOVIA RAPOSO TAVARES", "ACESSO RODOVIA RAPOSO TAVARES", "MARGINAL"], quantidade),
+        "latitude": -23.58 + aleatorio.normal(0, 0.01, quantidade),
+        "longitude": -46.75 + aleatorio.normal(0, 0.01, quantidade),
+        **{veiculo: aleatorio.integers(0, 2, quantidade) for veiculo in VEICULOS},
+    })
+    df = adicionar_calendario(aplicar_schema(df))
+    return df
+
+@pytest.fixture
+def sinistros():
+    return gerar_sinistros()
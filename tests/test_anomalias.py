@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import anomalias
+from cache_versao import versionar
+from conftest import gerar_sinistros
+
+@pytest.fixture(autouse=True)
+def diretorio_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(anomalias, "DIRETORIO_ANOMALIAS", tmp_path)
+
+def _recorte(df, versao):
+    df = df.copy()
+    versionar(df, versao)
+    return df
+
+def _com_picos(df):
+    # Dias com muitos sinistros a mais que o normal
+    picos = df.iloc[:12].copy()
+    picos = pd.concat([picos] * 3, ignore_index=True)
+    picos["Data do Sinistro"] = pd.Timestamp("2022-05-10 12:00")
+    picos["id_sinistro"] = np.arange(len(picos)) + 10_000
+    return pd.concat([df, picos], ignore_index=True)
+
+def test_detecta_dia_com_pico():
+    df = _recorte(_com_picos(gerar_sinistros(1500)), "pico|ano=2021-2023")
+    resultado = anomalias.anomalias_diarias.__wrapped__(df)
+    assert pd.Timestamp("2022-05-10") in resultado.index
+
+def test_estado_salvo_estende_sem_reprocessar(monkeypatch):
+    completo = _com_picos(gerar_sinistros(1500))
+    antigo = completo[completo["Data do Sinistro"] < "2023-01-01"]
+
+    referencia = anomalias.anomalias_diarias.__wrapped__(_recorte(completo, "ref|ano=x"))
+
+    anomalias.anomalias_diarias.__wrapped__(_recorte(antigo, "v1|ano=2021-2023"))
+    estado = anomalias.caminho_estado("v2|ano=2021-2023")
+    assert estado.exists()
+
+    # Com o estado salvo, só os dias novos (2023) passam pelo detector
+    dias_avaliados = []
+    atualizar = anomalias.DetectorAnomalias.atualizar
+    monkeypatch.setattr(
+        anomalias.DetectorAnomalias, "atualizar",
+        lambda self, contagem: dias_avaliados.append(contagem) or atualizar(self, contagem)
+    )
+    incremental = anomalias.anomalias_diarias.__wrapped__(_recorte(completo, "v2|ano=2021-2023"))
+
+    assert len(dias_avaliados) == 365
+    pd.testing.assert_frame_equal(incremental, referencia)
+
+def test_historico_alterado_reprocessa_tudo():
+    df = gerar_sinistros(1500)
+    anomalias.anomalias_diarias.__wrapped__(_recorte(df, "a|ano=2021-2023"))
+    # Um registro antigo removido muda o total já processado: o estado não vale mais
+    alterado = _recorte(df.iloc[1:], "b|ano=2021-2023")
+    serie = anomalias.serie_diaria(alterado)
+    assert anomalias._ler_estado(anomalias.caminho_estado("b|ano=2021-2023"), serie) is None
+
+def test_registro_movido_entre_dias_processados_reprocessa_tudo():
+    df = gerar_sinistros(1500)
+    anomalias.anomalias_diarias.__wrapped__(_recorte(df, "c|ano=2021-2023"))
+    # Mesmo total, mas um registro trocou de dia dentro do período já processado
+    alterado = df.copy()
+    alterado.loc[0, "Data do Sinistro"] = alterado["Data do Sinistro"].iloc[0] + pd.Timedelta(days=1)
+    serie = anomalias.serie_diaria(_recorte(alterado, "d|ano=2021-2023"))
+    assert anomalias._ler_estado(anomalias.caminho_estado("d|ano=2021-2023"), serie) is None
+
+def test_estados_em_disco_limitados(monkeypatch):
+    monkeypatch.setattr(anomalias, "MAXIMO_ESTADOS", 2)
+    df = gerar_sinistros(200)
+    for poligono in range(3):
+        anomalias.anomalias_diarias.__wrapped__(_recorte(df, f"e|poligono={poligono}"))
+    assert len(list(anomalias.DIRETORIO_ANOMALIAS.glob("detector-*.json"))) == 2
+    assert anomalias.caminho_estado("e|poligono=2").exists()
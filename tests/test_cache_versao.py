@@ -0,0 +1,82 @@
+import pandas as pd
+
+from cache_versao import em_cache_por_versao, versao_dos_dados, versionar, versionar_recorte
+
+def _df(versao):
+    df = pd.DataFrame({"valor": [1, 2, 3]})
+    versionar(df, versao)
+    return df
+
+def test_calcula_uma_vez_por_versao_e_argumentos():
+    chamadas = []
+
+    @em_cache_por_versao()
+    def somar(df, fator=1):
+        chamadas.append(fator)
+        return int(df["valor"].sum()) * fator
+
+    df = _df("v1-soma")
+    assert somar(df) == 6
+    assert somar(df, 1) == 6  # padrão preenchido: mesma entrada
+    assert somar(df, fator=2) == 12
+    assert chamadas == [1, 2]
+
+def test_funcoes_diferentes_nao_compartilham_cache():
+    @em_cache_por_versao()
+    def primeira(df):
+        return "primeira"
+
+    @em_cache_por_versao()
+    def segunda(df):
+        return "segunda"
+
+    df = _df("v1-funcoes")
+    assert (primeira(df), segunda(df)) == ("primeira", "segunda")
+
+def test_sem_versao_calcula_direto():
+    chamadas = []
+
+    @em_cache_por_versao()
+    def contar(df):
+        chamadas.append(1)
+        return len(df)
+
+    df = pd.DataFrame({"valor": [1]})
+    contar(df)
+    contar(df)
+    assert len(chamadas) == 2
+
+def test_max_entries_descarta_versoes_antigas():
+    chamadas = []
+
+    @em_cache_por_versao(recurso=True, max_entries=2)
+    def objeto(df):
+        chamadas.append(df.attrs["versao"])
+        return object()
+
+    for versao in ("a", "b", "c"):
+        objeto(_df(versao))
+    objeto(_df("a"))
+    assert chamadas == ["a", "b", "c", "a"]
+
+def test_recorte_com_versao_herdada_nao_usa_o_cache():
+    # Recortes diferentes de mesmo tamanho herdam a mesma versão do original
+    chamadas = []
+
+    @em_cache_por_versao()
+    def somar(df):
+        chamadas.append(1)
+        return int(df["valor"].sum())
+
+    df = versionar(pd.DataFrame({"valor": [1, 2, 3, 4]}), "v1-herdada")
+    assert somar(df[[True, True, False, False]]) == 3
+    assert somar(df[[False, False, True, True]]) == 7
+    assert versao_dos_dados(df.copy()) == "v1-herdada"
+    assert len(chamadas) == 2
+
+def test_versionar_recorte():
+    df = versionar(pd.DataFrame({"valor": [1, 2, 3]}), "v1")
+    recorte = versionar_recorte(df[df["valor"] > 1], df, "filtro=x")
+    assert versao_dos_dados(recorte) == "v1|filtro=x"
+    sem_versao = pd.DataFrame({"valor": [1]})
+    assert versao_dos_dados(versionar_recorte(sem_versao.iloc[:1], sem_versao, "filtro=x")) is None
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from cache_versao import versao_dos_dados, versionar
+from colunas import coluna
+from espacial import filtrar_veiculo, quadros_sinistros
+
+def test_coluna_de_recorte_com_attrs_herdados(sinistros):
+    # Regressão: df[mascara] herda attrs["versao"] e recebia a coluna do original
+    versionar(sinistros, "teste-colunas")
+    assert len(coluna(sinistros, "Ano/Mês")) == len(sinistros)
+
+    recorte = sinistros[sinistros["Motocicleta envolvida"] > 0]
+    assert recorte.attrs["versao"] == "teste-colunas" and versao_dos_dados(recorte) is None
+    ano_mes = coluna(recorte, "Ano/Mês")
+    assert ano_mes.index.equals(recorte.index)
+    pd.testing.assert_series_equal(ano_mes, recorte["Data do Sinistro"].dt.to_period("M").astype("category"),
+                                   check_names=False, check_categorical=False)
+
+def test_filtrar_veiculo_identifica_o_filtro_na_versao(sinistros):
+    versionar(sinistros, "teste-veiculo")
+    motos = filtrar_veiculo(sinistros, "Motocicleta envolvida")
+    assert motos.attrs["versao"] == "teste-veiculo|veiculo=Motocicleta envolvida"
+    assert filtrar_veiculo(sinistros) is sinistros
+
+def test_quadros_de_motos_por_mes(sinistros):
+    # Regressão: IndexError em agrupar_em_quadros para "Somente motocicletas" por mês
+    versionar(sinistros, "teste-quadros")
+    coluna(sinistros, "Ano/Mês")
+    rotulos, celulas = quadros_sinistros(sinistros, "mes", veiculo="Motocicleta envolvida")
+    assert celulas["count"].sum() == (sinistros["Motocicleta envolvida"] > 0).sum()
+
+def test_alterar_coluna_recebida_nao_altera_o_cache(sinistros):
+    versionar(sinistros, "teste-copias")
+    for nome in ("Ano", "Mês", "Ano/Mês", "Data"):
+        original = coluna(sinistros, nome).copy()
+        recebida = coluna(sinistros, nome)
+        recebida.iloc[0] = recebida.iloc[1]
+        pd.testing.assert_series_equal(coluna(sinistros, nome), original)
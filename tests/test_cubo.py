@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from cache_versao import versionar
+from conftest import gerar_sinistros
+from cubo import NAO_INFORMADO, CuboSinistros
+from data import VEICULOS, adicionar_calendario, filtrar_periodo
+
+def _com_ausentes(df):
+    df = df.copy()
+    df.loc[df.index[:5], "Hora do Sinistro"] = np.nan
+    df["Logradouro"] = df["Logradouro"].astype(object)
+    df.loc[df.index[5:9], "Logradouro"] = None
+    df.loc[df.index[9:12], "Data do Sinistro"] = pd.NaT
+    return adicionar_calendario(df)
+
+def test_total_do_cubo_igual_ao_numero_de_linhas(sinistros):
+    df = _com_ausentes(sinistros)
+    cubo = CuboSinistros.construir(df)
+
+    assert cubo.somar() == len(df)
+    assert (cubo.somar(veiculos=True) == df[VEICULOS].sum()).all()
+    for dim in ("ano", "mes", "dia_semana", "hora", "logradouro"):
+        assert cubo.somar(dim).sum() == len(df)
+    assert cubo.somar("hora")[NAO_INFORMADO] == 5
+    assert cubo.somar("logradouro")[NAO_INFORMADO] == 4
+    assert cubo.somar("ano")[NAO_INFORMADO] == 3
+
+def test_informados_descarta_posicao_nao_informado(sinistros):
+    cubo = CuboSinistros.construir(_com_ausentes(sinistros))
+
+    por_hora = cubo.somar("hora", informados=True)
+    assert list(por_hora.index) == list(range(24))
+    assert cubo.matriz_dia_hora().shape == (7, 24)
+    assert cubo.matriz_dia_hora().sum() == cubo.somar(("dia_semana", "hora"), informados=True).sum()
+
+def test_recorte_por_ano_igual_ao_filtro_do_dataframe(sinistros):
+    df = _com_ausentes(sinistros)
+    versionar(df, "teste")
+    cubo = CuboSinistros.construir(df).fatiar(ano=range(2021, 2023))
+
+    assert cubo.somar() == len(filtrar_periodo(df, 2021, 2022))
+    # Sem data não entra no recorte por ano: as posições esvaziadas saem dos eixos
+    assert NAO_INFORMADO not in cubo.eixos["mes"]
+    assert NAO_INFORMADO not in cubo.eixos["dia_semana"]
+    assert NAO_INFORMADO in cubo.eixos["hora"]
+
+def test_cubo_sem_ausentes_mantem_eixos_numericos():
+    cubo = CuboSinistros.construir(gerar_sinistros(100))
+    assert list(cubo.eixos["hora"]) == list(range(24))
+    assert cubo.somar() == 100
+
+def test_por_mes_vai_do_primeiro_ao_ultimo_mes_com_registro(sinistros):
+    df = _com_ausentes(sinistros[sinistros["Data do Sinistro"] < "2023-06-01"])
+    cubo = CuboSinistros.construir(df)
+
+    serie = cubo.por_mes()
+    assert str(serie.index[0]) == "2021-01" and str(serie.index[-1]) == "2023-05"
+    assert serie.sum() == df["Data do Sinistro"].notna().sum()
+
+    por_logradouro = cubo.por_mes("logradouro")
+    assert por_logradouro.index.equals(serie.index)
+    assert (por_logradouro.sum(axis=1) == serie).all()
+    assert NAO_INFORMADO in por_logradouro.columns
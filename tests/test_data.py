@@ -0,0 +1,25 @@
+import pandas as pd
+
+import data
+from conftest import gerar_sinistros
+
+def test_snapshot_gravado_e_relido(tmp_path, monkeypatch):
+    df = gerar_sinistros(50)
+    leituras = []
+    monkeypatch.setattr(data, "DIRETORIO_CACHE", tmp_path)
+    monkeypatch.setattr(data, "ler_planilha", lambda caminho: leituras.append(caminho) or df.copy())
+
+    data.carregar_snapshot("planilha.xlsx", "abc")
+    relido = data.carregar_snapshot("planilha.xlsx", "abc")
+
+    assert leituras == ["planilha.xlsx"]
+    pd.testing.assert_frame_equal(relido, df)
+    # Nenhum arquivo temporário fica para trás
+    assert [arquivo.suffix for arquivo in tmp_path.iterdir()] == [".arrow"]
+
+def test_converter_km_descarta_valores_fora_do_trecho():
+    numero_km = pd.Series(["15", "23,5", "km 12+500", "100", "270", "509", "Rua X"])
+    km = data.converter_km(numero_km, data.FAIXAS_KM["raposo_nao_fatal.xlsx"])
+    assert km.tolist()[:3] == [15.0, 23.5, 12.5]
+    assert km.iloc[3:].isna().all()
+    assert data.converter_km(pd.Series([100.0, 700.0, 701.0])).tolist()[:2] == [100.0, 700.0]
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from matplotlib.path import Path
+
+from cache_versao import versionar
+from config import MAP_CENTER
+from espacial import celulas_sinistros, centro_celulas, filtrar_poligono, pontos_no_poligono
+from mapas import construir_mapa_calor, renderizar_mapa
+
+# Polígono côncavo (em "L") ao redor do centro dos dados sintéticos
+POLIGONO = [
+    [-23.60, -46.77], [-23.60, -46.73], [-23.59, -46.73], [-23.59, -46.76],
+    [-23.56, -46.76], [-23.56, -46.77], [-23.60, -46.77],
+]
+
+def test_pontos_no_poligono_igual_ao_teste_de_referencia():
+    aleatorio = np.random.default_rng(1)
+    latitudes = aleatorio.uniform(-23.62, -23.54, 20_000)
+    longitudes = aleatorio.uniform(-46.79, -46.71, 20_000)
+
+    # matplotlib espera (x, y) = (lon, lat)
+    referencia = Path(np.array(POLIGONO)[:, ::-1]).contains_points(np.column_stack([longitudes, latitudes]))
+    assert np.array_equal(pontos_no_poligono(latitudes, longitudes, POLIGONO), referencia)
+
+def test_pontos_no_poligono_ignora_coordenadas_ausentes_e_poligono_degenerado():
+    assert not pontos_no_poligono([np.nan], [np.nan], POLIGONO).any()
+    assert not pontos_no_poligono([-23.58], [-46.765], POLIGONO[:2]).any()
+
+def test_filtrar_poligono_identifica_a_area_na_versao(sinistros):
+    versionar(sinistros, "teste-poligono")
+    area = filtrar_poligono(sinistros, POLIGONO)
+
+    esperado = pontos_no_poligono(sinistros["latitude"], sinistros["longitude"], POLIGONO)
+    assert len(area) == esperado.sum()
+    assert area.attrs["versao"].startswith("teste-poligono|poligono=")
+
+def test_centro_celulas_sem_celulas_usa_centro_padrao():
+    vazio = pd.DataFrame({"latitude": [], "longitude": [], "count": []})
+    assert centro_celulas(vazio) == MAP_CENTER
+    sem_peso = pd.DataFrame({"latitude": [-23.5], "longitude": [-46.7], "count": [0]})
+    assert centro_celulas(sem_peso) == MAP_CENTER
+
+def test_mapa_de_motos_sem_motocicletas_no_recorte(sinistros):
+    # Regressão: ZeroDivisionError em centro_celulas ao montar o mapa de motos
+    sem_motos = sinistros[sinistros["Motocicleta envolvida"] == 0]
+    assert celulas_sinistros(sem_motos, veiculo="Motocicleta envolvida").empty
+    assert "leaflet" in renderizar_mapa(construir_mapa_calor(sem_motos, "moto")).lower()
@@ -0,0 +1,30 @@
+from cache_versao import versionar
+from conftest import gerar_sinistros
+from tabs.geocerca import recorte_geocerca, vertices_desenho
+
+def _quadrado(latitude, longitude, lado=0.0002):
+    return [
+        [latitude - lado, longitude - lado], [latitude - lado, longitude + lado],
+        [latitude + lado, longitude + lado], [latitude + lado, longitude - lado],
+        [latitude - lado, longitude - lado],
+    ]
+
+def test_area_so_com_sinistros_fora_do_periodo_nao_e_aplicada():
+    # Regressão: área só com sinistros de 2024 deixava o recorte 2021-2023 vazio
+    df = gerar_sinistros(50, inicio="2024-01-01", fim="2024-12-31")
+    versionar(df, "teste-2024")
+    area = _quadrado(df["latitude"].iloc[0], df["longitude"].iloc[0])
+
+    assert recorte_geocerca(df, area, 2021, 2024) is not None
+    assert recorte_geocerca(df, area, 2021, 2023) is None
+
+def test_area_com_sinistros_no_periodo(sinistros):
+    versionar(sinistros, "teste-periodo")
+    area = _quadrado(sinistros["latitude"].iloc[0], sinistros["longitude"].iloc[0])
+    recorte = recorte_geocerca(sinistros, area, 2021, 2023)
+    assert recorte is not None and len(recorte) >= 1
+
+def test_vertices_desenho_converte_geojson():
+    desenho = {"geometry": {"type": "Polygon", "coordinates": [[[-46.7, -23.5], [-46.6, -23.5], [-46.6, -23.4]]]}}
+    assert vertices_desenho(desenho) == [[-23.5, -46.7], [-23.5, -46.6], [-23.4, -46.6]]
+    assert vertices_desenho({"geometry": {"type": "Point"}}) is None
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from indice_espacial import IndiceEspacial, distancia_haversine
+
+@pytest.fixture(scope="module")
+def pontos():
+    aleatorio = np.random.default_rng(3)
+    latitudes = aleatorio.normal(-23.58, 0.02, 5_000)
+    longitudes = aleatorio.normal(-46.75, 0.02, 5_000)
+    latitudes[::97] = np.nan
+    return latitudes, longitudes
+
+def test_retangulo_igual_a_varredura(pontos):
+    latitudes, longitudes = pontos
+    indice = IndiceEspacial(latitudes, longitudes)
+    sul, oeste, norte, leste = -23.59, -46.76, -23.57, -46.74
+
+    with np.errstate(invalid="ignore"):
+        esperado = np.flatnonzero(
+            (latitudes >= sul) & (latitudes <= norte) & (longitudes >= oeste) & (longitudes <= leste)
+        )
+    assert np.array_equal(indice.retangulo(sul, oeste, norte, leste), esperado)
+
+@pytest.mark.parametrize("metros", [50, 500, 3000])
+def test_raio_igual_a_varredura(pontos, metros):
+    latitudes, longitudes = pontos
+    indice = IndiceEspacial(latitudes, longitudes)
+    distancias = distancia_haversine(-23.58, -46.75, latitudes, longitudes)
+
+    posicoes, dist = indice.raio(-23.58, -46.75, metros, distancias=True)
+    assert set(posicoes) == set(np.flatnonzero(distancias <= metros))
+    assert np.all(np.diff(dist) >= 0)
+    assert indice.contar_raio(-23.58, -46.75, metros) == len(posicoes)
+
+def test_vizinhos_igual_a_ordenacao_completa(pontos):
+    latitudes, longitudes = pontos
+    indice = IndiceEspacial(latitudes, longitudes)
+    distancias = distancia_haversine(-23.7, -46.9, latitudes, longitudes)
+
+    posicoes, dist = indice.vizinhos(-23.7, -46.9, k=10, distancias=True)
+    assert np.allclose(dist, np.sort(distancias[np.isfinite(distancias)])[:10])
+    assert np.allclose(distancias[posicoes], dist)
+
+def test_consultas_fora_da_area_e_indice_vazio():
+    indice = IndiceEspacial([-23.5], [-46.7])
+    assert len(indice.retangulo(10, 10, 11, 11)) == 0
+    vazio = IndiceEspacial([], [])
+    assert len(vazio.raio(-23.5, -46.7, 1000)) == 0
+    assert len(vazio.vizinhos(-23.5, -46.7, k=3)) == 0
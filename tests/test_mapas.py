@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+import mapas
+from espacial import piramide_celulas
+
+@pytest.fixture(autouse=True)
+def diretorio_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapas, "DIRETORIO_MAPAS", tmp_path)
+    # O "mapa" dos testes já é o HTML
+    monkeypatch.setattr(mapas, "renderizar_mapa", lambda mapa: mapa)
+
+def _html(versao, chave, construidos):
+    return mapas.html_mapa(versao, "teste", lambda: construidos.append(chave) or f"<p>{chave}</p>", chave=chave)
+
+def test_mapa_salvo_e_reaproveitado():
+    construidos = []
+    assert _html("v1|a", 1, construidos) == "<p>1</p>"
+    assert _html("v1|a", 1, construidos) == "<p>1</p>"
+    assert construidos == [1]
+
+def test_arquivo_removido_por_outro_processo_e_gerado_de_novo():
+    construidos = []
+    _html("v1", 1, construidos)
+    mapas.caminho_mapa("v1", "teste", chave=1).unlink()
+    assert _html("v1", 1, construidos) == "<p>1</p>"
+    assert construidos == [1, 1]
+
+def test_disco_limitado_aos_mapas_usados_mais_recentemente(monkeypatch):
+    monkeypatch.setattr(mapas, "MAXIMO_MAPAS_DISCO", 3)
+    construidos = []
+    for chave in range(3):
+        _html("v1", chave, construidos)
+        os.utime(mapas.caminho_mapa("v1", "teste", chave=chave), ns=(chave, chave))
+    # Ler o mapa 0 o torna o mais recente; o 1 passa a ser o descartado
+    _html("v1", 0, construidos)
+    _html("v1", 3, construidos)
+
+    restantes = {chave for chave in range(4) if mapas.caminho_mapa("v1", "teste", chave=chave).exists()}
+    assert restantes == {0, 2, 3}
+
+def test_nova_versao_dos_dados_apaga_mapas_antigos():
+    construidos = []
+    _html("v1", 1, construidos)
+    _html("v2", 1, construidos)
+    assert [pasta.name for pasta in mapas.DIRETORIO_MAPAS.iterdir()] == ["v2"]
+
+def test_camada_piramide_limita_os_niveis_enviados():
+    aleatorio = np.random.default_rng(0)
+    piramide = piramide_celulas(aleatorio.normal(-23.58, 0.05, 20_000), aleatorio.normal(-46.75, 0.05, 20_000))
+
+    completa = mapas.CamadaPiramide(piramide)
+    limitada = mapas.CamadaPiramide(piramide, limite_celulas=500)
+    assert completa.zoom_max == max(piramide)
+    assert limitada.zoom_min == min(piramide) and limitada.zoom_max < completa.zoom_max
+    assert all(len(piramide[zoom]) <= 500 for zoom in limitada.niveis)
+
+    # Nem o nível mais afastado cabe no limite: ele vai sozinho
+    assert list(mapas.CamadaPiramide(piramide, limite_celulas=0).niveis) == [min(piramide)]
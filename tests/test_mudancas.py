@@ -0,0 +1,48 @@
+import numpy as np
+
+from conftest import gerar_sinistros
+from cubo import CuboSinistros
+from mudancas import SERIE_GERAL, matriz_mensal, medias_regimes, mudancas_regime, segmentar
+
+def test_detecta_mudanca_plantada():
+    aleatorio = np.random.default_rng(0)
+    serie = np.r_[aleatorio.poisson(2, 20), aleatorio.poisson(8, 16)]
+    inicios = segmentar(serie[None])[0]
+    mudancas = np.flatnonzero(inicios[1:]) + 1
+    assert len(mudancas) == 1 and abs(mudancas[0] - 20) <= 1
+
+def test_serie_estavel_sem_mudancas():
+    aleatorio = np.random.default_rng(1)
+    inicios = segmentar(aleatorio.poisson(5, (20, 36)))
+    assert not inicios[:, 1:].any()
+
+def test_lote_igual_a_serie_por_serie():
+    aleatorio = np.random.default_rng(2)
+    matriz = aleatorio.poisson(aleatorio.uniform(0.5, 5, (40, 1)), (40, 36))
+    matriz[:20, 18:] += 4
+    lote = segmentar(matriz)
+    for i in range(len(matriz)):
+        assert np.array_equal(segmentar(matriz[i:i + 1])[0], lote[i])
+    assert lote[:20, 1:].any(axis=1).all()
+
+def test_medias_regimes():
+    matriz = np.array([[1, 1, 5, 5], [2, 2, 2, 2]])
+    inicios = np.array([[True, False, True, False], [True, False, False, False]])
+    assert np.array_equal(medias_regimes(matriz, inicios), [[1, 1, 5, 5], [2, 2, 2, 2]])
+
+def test_matriz_mensal_para_no_ultimo_mes_com_registro():
+    # Regressão: ano final parcial virava meses zerados e uma queda fictícia
+    df = gerar_sinistros(2000, inicio="2021-01-01", fim="2023-04-30")
+    matriz = matriz_mensal(CuboSinistros.construir(df))
+    assert str(matriz.index[-1]) == "2023-04"
+    assert (matriz[SERIE_GERAL] == matriz.drop(columns=SERIE_GERAL).sum(axis=1)).all()
+    assert matriz[SERIE_GERAL].sum() == len(df)
+
+    _, _, mudancas = mudancas_regime.__wrapped__(CuboSinistros.construir(df))
+    assert not (mudancas["Logradouro"] == SERIE_GERAL).any()
+
+def test_matriz_mensal_de_cubo_vazio():
+    cubo = CuboSinistros.construir(gerar_sinistros(10).iloc[:0])
+    assert matriz_mensal(cubo).empty
+    mensal, regimes, mudancas = mudancas_regime.__wrapped__(cubo)
+    assert mensal.empty and regimes.empty and mudancas.empty
@@ -0,0 +1,46 @@
+import numpy as np
+
+from pontos_criticos import componentes_celulas, detectar_pontos_criticos
+
+def _componentes_referencia(linhas, colunas):
+    """Busca em largura sobre a vizinhança de 8, célula a célula"""
+    posicao = {(l, c): i for i, (l, c) in enumerate(zip(linhas, colunas))}
+    rotulos = np.full(len(linhas), -1)
+    atual = 0
+    for inicio in range(len(linhas)):
+        if rotulos[inicio] >= 0:
+            continue
+        fila = [inicio]
+        rotulos[inicio] = atual
+        while fila:
+            i = fila.pop()
+            for dl in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    j = posicao.get((linhas[i] + dl, colunas[i] + dc))
+                    if j is not None and rotulos[j] < 0:
+                        rotulos[j] = atual
+                        fila.append(j)
+        atual += 1
+    return rotulos
+
+def _mesma_particao(a, b):
+    pares = set(zip(a.tolist(), b.tolist()))
+    return len(pares) == len(set(a.tolist())) == len(set(b.tolist()))
+
+def test_componentes_celulas_igual_a_busca_em_largura():
+    aleatorio = np.random.default_rng(2)
+    celulas = np.unique(aleatorio.integers(0, 60, (900, 2)), axis=0)
+    linhas, colunas = celulas[:, 0], celulas[:, 1]
+
+    rotulos = componentes_celulas(linhas, colunas)
+    assert _mesma_particao(rotulos, _componentes_referencia(linhas, colunas))
+
+def test_componentes_celulas_liga_diagonais():
+    rotulos = componentes_celulas(np.array([0, 1, 5]), np.array([0, 1, 5]))
+    assert rotulos[0] == rotulos[1] != rotulos[2]
+
+def test_detectar_pontos_criticos_conta_todos_os_sinistros_das_celulas_densas(sinistros):
+    pontos = detectar_pontos_criticos(sinistros, resolucao=0.005, minimo=1)
+    assert pontos["Sinistros"].sum() == sinistros["latitude"].notna().sum()
+    assert list(pontos.index[:3]) == [1, 2, 3]
+    assert pontos["Sinistros"].is_monotonic_decreasing
@@ -0,0 +1,34 @@
+import numpy as np
+
+from conftest import gerar_sinistros
+from cubo import CuboSinistros
+from previsao import MINIMO_MESES_PREVISAO, decompor, decomposicao_e_previsao, serie_mensal
+
+def test_serie_mensal_de_cubo_vazio():
+    # Regressão: PeriodIndex sem freq levantava ValueError com o cubo vazio
+    cubo = CuboSinistros.construir(gerar_sinistros(10).iloc[:0])
+    assert serie_mensal(cubo).empty
+
+def test_serie_mensal_soma_o_recorte(sinistros):
+    serie = serie_mensal(CuboSinistros.construir(sinistros))
+    assert serie.sum() == sinistros["Data do Sinistro"].notna().sum()
+    assert serie.index.is_monotonic_increasing and serie.index.freqstr == "M"
+
+def test_menos_de_dois_ciclos_sem_previsao():
+    cubo = CuboSinistros.construir(gerar_sinistros(200, inicio="2023-01-01", fim="2023-12-31"))
+    decomposicao, previsao = decomposicao_e_previsao.__wrapped__(cubo)
+    assert len(decomposicao) < MINIMO_MESES_PREVISAO
+    assert decomposicao["Tendência"].isna().all() and previsao.empty
+
+def test_previsao_com_horizonte_pedido(sinistros):
+    decomposicao, previsao = decomposicao_e_previsao.__wrapped__(CuboSinistros.construir(sinistros), 6)
+    assert len(previsao) == 6 and previsao.index[0] == decomposicao.index[-1] + 1
+    assert (previsao["Limite inferior"] <= previsao["Previsto"]).all()
+
+def test_decompor_recupera_sazonalidade():
+    meses = np.arange(48)
+    indices = 5 * np.sin(2 * np.pi * meses[:12] / 12)
+    valores = 50 + 0.5 * meses + indices[meses % 12]
+    _, _, residuo, estimados = decompor(valores)
+    assert np.allclose(estimados, indices - indices.mean(), atol=0.3)
+    assert np.nanmax(np.abs(residuo)) < 0.5
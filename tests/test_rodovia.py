@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+import rodovia
+from quilometragem import quilometragem
+from rodovia import ARQUIVO_RODOVIA, LIMITE_AFASTAMENTO, carregar_polilinha, projetar_na_polilinha
+
+# Traçado em "L": 1 km para o leste e 1 km para o norte, começando no km 10
+VERTICES = np.array([[-23.60, -46.80], [-23.60, -46.7902], [-23.591, -46.7902]])
+
+def test_projecao_em_cada_perna_do_tracado():
+    latitudes = [-23.6005, -23.5955, np.nan]
+    longitudes = [-46.7951, -46.7897, -46.79]
+    km, afastamento = projetar_na_polilinha(latitudes, longitudes, VERTICES, km_inicial=10)
+
+    # Meio da primeira perna, a ~55 m ao sul; meio da segunda, a ~51 m a leste
+    assert abs(km[0] - 10.5) < 0.01 and abs(afastamento[0] - 55.6) < 1
+    assert abs(km[1] - 11.5) < 0.01 and abs(afastamento[1] - 51.0) < 1
+    assert np.isnan(km[2]) and np.isnan(afastamento[2])
+
+def test_projecao_em_blocos_igual_a_direta(monkeypatch):
+    aleatorio = np.random.default_rng(0)
+    latitudes = aleatorio.uniform(-23.61, -23.59, 500)
+    longitudes = aleatorio.uniform(-46.81, -46.78, 500)
+    direta = projetar_na_polilinha(latitudes, longitudes, VERTICES)
+    monkeypatch.setattr(rodovia, "LIMITE_BLOCO_PROJECAO", 10)
+    em_blocos = projetar_na_polilinha(latitudes, longitudes, VERTICES)
+    assert np.allclose(direta, em_blocos)
+
+def test_tracado_da_raposo_tavares():
+    vertices, km_inicial = carregar_polilinha(ARQUIVO_RODOVIA)
+    assert len(vertices) > 10 and 0 < km_inicial < 20
+    # Do leste (Butantã) para o oeste (Cotia): a quilometragem cresce para o oeste
+    assert vertices[0, 1] > vertices[-1, 1]
+    km, afastamento = projetar_na_polilinha([-23.587858], [-46.751171], vertices, km_inicial)
+    assert abs(km[0] - 14.5) < 0.01 and afastamento[0] < LIMITE_AFASTAMENTO
+
+def test_km_informado_so_quando_longe_do_tracado():
+    df = pd.DataFrame({
+        "KM": [12.0, 12.0, np.nan, 5.0],
+        "KM projetado": [15.0, 15.0, 16.0, np.nan],
+        "Afastamento (m)": [40.0, LIMITE_AFASTAMENTO + 1, 10.0, np.nan],
+    })
+    assert np.allclose(quilometragem(df), [15.0, 12.0, 16.0, 5.0])
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+import tendencias
+from cache_versao import versionar
+from conftest import gerar_sinistros
+from tendencias import SerieDiaria
+
+def _datas(quantidade, semente, inicio="2021-01-01", fim="2022-12-31"):
+    aleatorio = np.random.default_rng(semente)
+    return pd.Series(aleatorio.choice(pd.date_range(inicio, fim, freq="h"), quantidade))
+
+def test_acrescentar_igual_a_recalcular_do_zero():
+    antigas = _datas(800, 4)
+    novas = pd.concat([_datas(200, 5, "2022-06-01", "2023-06-30"), _datas(20, 6, "2020-12-01", "2020-12-31")])
+    todas = pd.concat([antigas, novas], ignore_index=True)
+    ids = pd.Series(np.arange(len(todas)))
+
+    incremental = SerieDiaria(antigas, ids[:len(antigas)]).acrescentar(novas, ids[len(antigas):])
+    completa = SerieDiaria(todas, ids)
+    pd.testing.assert_frame_equal(incremental.tabela(), completa.tabela())
+
+def test_ids_repetidos_nao_contam_duas_vezes():
+    datas = _datas(100, 7)
+    ids = pd.Series(np.arange(100))
+    serie = SerieDiaria(datas, ids).acrescentar(datas, ids)
+    assert serie.contagens.sum() == 100
+
+def test_medias_e_ewma_iguais_ao_pandas():
+    tabela = SerieDiaria(_datas(600, 8)).tabela()
+    contagens = tabela["Sinistros"].astype(float)
+    for janela in (7, 30):
+        esperado = contagens.rolling(janela).mean()
+        assert np.allclose(tabela[f"Média {janela} dias"], esperado, equal_nan=True)
+    assert np.allclose(tabela["EWMA"], contagens.ewm(span=14, adjust=False).mean())
+
+def test_copiar_nao_altera_a_serie_original():
+    original = SerieDiaria(_datas(50, 9))
+    total = original.contagens.sum()
+    original.copiar().acrescentar(_datas(10, 10))
+    assert original.contagens.sum() == total
+
+def _serie_versao(df, versao):
+    df = df.copy()
+    versionar(df, versao)
+    return tendencias.serie_diaria.__wrapped__(df)
+
+def test_data_alterada_de_registro_antigo_recalcula_a_serie():
+    df = gerar_sinistros(500)
+    _serie_versao(df, "datas-v1|ano=2021-2023")
+    # Mesmos ids, mas um registro mudou de dia: a série anterior não pode ser estendida
+    alterado = df.copy()
+    alterado.loc[0, "Data do Sinistro"] = pd.Timestamp("2021-01-01 08:00")
+    serie = _serie_versao(alterado, "datas-v2|ano=2021-2023")
+    pd.testing.assert_frame_equal(serie.tabela(), _serie_versao(alterado, "datas-ref|ano=x").tabela())